@@ -1,10 +1,19 @@
 import sys
 import random
 import math
+import numpy as np
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
+from frame_profiler import make_profiler
+from frame_scheduler import FrameScheduler
+from game3d_entities import BulletStore, EnemyStore, SpatialHash, find_hits
+from game3d_lod import SphereLists, select_levels
+from game3d_targeting import heading, lead_point, nearest_in_cone
+from hud_text import TextCache
+from scene_graph import Node
+
 # Game state
 player_life = 5
 score = 0
@@ -23,12 +32,56 @@ camera_angle = 45
 camera_height = 3
 first_person = False
 
-# Game objects
-bullets = []
-enemies = []
-grid_size = 20
+# Game objects, stored as NumPy columns and updated in bulk
+BULLET_POOL = 256  # Preallocated bullet slots; a bullet lives at most 150 ticks, so auto-fire never fills it
+bullets = BulletStore(BULLET_POOL, fixed=True)
+enemies = EnemyStore()
+ARENA_SIZE = 20  # Floor side outside wave mode; big waves widen it
+grid_size = ARENA_SIZE
+BULLET_SPEED = 0.3  # Distance per tick
+
+# Wave mode ('v'): shot enemies stay dead and growing waves march in from the walls
+WAVE_FIRST = 10
+WAVE_GROWTH = 1.5
+WAVE_MAX = 5000
+WAVE_COVER = 0.5  # Floor share a wave's full-size enemies may cover; the arena grows to keep it so separation can settle
+wave_mode = False
+wave = 0
+
+# Cheat mode auto-aim
+AUTO_AIM_CONE = 15  # Degrees either side of the gun
+
+# Level of detail by distance from the camera eye: finest first, one level per threshold passed
+ENEMY_LOD_DISTANCES = (10, 18)
+ENEMY_LODS = ((20, 20, 10), (12, 8, 6), (6, 4, 0))  # Body slices, body stacks, eye slices (0: no eye)
+PLAYER_LOD_DISTANCES = (12, 24)
+PLAYER_LODS = ((20, 10), (10, 6), (6, 4))  # Head slices, limb slices
+player_lod = np.zeros(1, dtype=np.int64)
+view_eye = (0, 0, 0)  # Set by display() from the gluLookAt eye
+spheres = SphereLists()
+
+# Retained scene: world and player models are built once and baked into display lists on first draw
+world = None
+player_models = None
+
+# Frame loop: the game updates in fixed 60 Hz ticks
+TICK = 1 / 60
+TARGET_FPS = 60
+MAX_CPU = 1.0  # Fraction of wall time frames may spend updating and drawing
+scheduler = None
+
+# Window size, kept up to date by reshape() instead of querying glutGet every frame
+window_width = 800
+window_height = 600
+
+# HUD lines, compiled once per distinct text
+hud = TextCache(window_width, window_height)
+
+# Frame phase timing, shown as an overlay when FRAME_PROFILE is set
+profiler = make_profiler(('update', 'grid', 'entities', 'hud', 'swap'))
 
 def init():
+    global world, player_models
     glClearColor(0.0, 0.0, 0.0, 1.0)
     glEnable(GL_DEPTH_TEST)
     
@@ -36,6 +89,9 @@ def init():
     for _ in range(5):
         spawn_enemy()
     
+    world = build_world()
+    player_models = [build_player(level) for level in range(len(PLAYER_LODS))]
+    
     # Lighting setup
     glEnable(GL_LIGHTING)
     glEnable(GL_LIGHT0)
@@ -43,105 +99,125 @@ def init():
     glLightfv(GL_LIGHT0, GL_DIFFUSE, [1, 1, 1, 1])
     glLightfv(GL_LIGHT0, GL_AMBIENT, [0.2, 0.2, 0.2, 1])
     glEnable(GL_COLOR_MATERIAL)
+    glEnable(GL_RESCALE_NORMAL)  # Spheres are drawn as scaled unit spheres
 
-def spawn_enemy():
+def spawn_enemy(x=None, z=None):
     half = grid_size/2 - 2
-    enemies.append({
-        'x': random.uniform(-half, half),
-        'y': 0.5,
-        'z': random.uniform(-half, half),
-        'size': random.uniform(0.3, 0.6),
-        'growing': True,
-        'speed': random.uniform(0.01, 0.03)
-    })
-
-def draw_player():
-    glPushMatrix()
-    glTranslatef(*player_pos)
-    glRotatef(player_rotation, 0, 1, 0)
-    
-    # HEAD - Sphere (size: 0.25 units)
-    glPushMatrix()
-    glColor3f(0.8, 0.6, 0.4)  # Skin color
-    glTranslatef(0, 1.75, 0)  # Position above body
-    glutSolidSphere(0.25, 20, 20)
-    glPopMatrix()
-    
-    # BODY - Cuboid (size: 0.5w × 1.0h × 0.3d)
-    glPushMatrix()
-    glColor3f(0.1, 0.3, 0.8)  # Shirt color
-    glTranslatef(0, 1.0, 0)
-    glScalef(0.5, 1.0, 0.3)
-    glutSolidCube(1.0)
-    glPopMatrix()
-    
-    # LEGS - Two Cylinders
-    glPushMatrix()
-    glColor3f(0.2, 0.2, 0.2)  # Pants color
-    # Left leg
-    glPushMatrix()
-    glTranslatef(-0.15, 0.5, 0)
-    glutSolidCylinder(0.12, 0.8, 10, 10)
-    glPopMatrix()
-    # Right leg
-    glPushMatrix()
-    glTranslatef(0.15, 0.5, 0)
-    glutSolidCylinder(0.12, 0.8, 10, 10)
-    glPopMatrix()
-    glPopMatrix()
-    
-    # ARMS - Two Cylinders
-    glPushMatrix()
-    glColor3f(0.8, 0.6, 0.4)  # Skin color
-    # Left arm
-    glPushMatrix()
-    glTranslatef(-0.35, 1.25, 0)
-    glRotatef(90, 0, 1, 0)
-    glutSolidCylinder(0.08, 0.5, 10, 10)
-    glPopMatrix()
-    
-    # Right arm with gun
-    glPushMatrix()
-    glTranslatef(0.35, 1.25, 0)
-    glRotatef(90, 0, 1, 0)
-    glutSolidCylinder(0.08, 0.5, 10, 10)
-    
-    # GUN - Combination of cylinder and cuboid
-    glPushMatrix()
-    glTranslatef(0, 0, 0.5)  # Position at end of arm
-    glRotatef(gun_rotation, 0, 1, 0)  # Gun rotation
-    
-    # Gun barrel - Cylinder
-    glColor3f(0.3, 0.3, 0.3)
-    glutSolidCylinder(0.05, 0.7, 10, 10)
-    
-    # Gun handle - Cuboid
-    glColor3f(0.2, 0.2, 0.2)
-    glTranslatef(0, -0.1, 0.35)
-    glScalef(0.2, 0.15, 0.4)
-    glutSolidCube(1.0)
-    
-    glPopMatrix()  # Gun
-    glPopMatrix()  # Right arm
-    glPopMatrix()  # Arms
-    
-    glPopMatrix()  # Player
+    if x is None:
+        x = random.uniform(-half, half)
+        z = random.uniform(-half, half)
+    size = random.uniform(0.3, 0.6)
+    speed = random.uniform(0.01, 0.03)
+    enemies.append((x, 0.5, z, size, 1.0, speed, 0.0))
+
+def arena_size(count):
+    """Even floor side on which `count` full-size enemies cover at most WAVE_COVER of the floor."""
+    side = math.sqrt(count * math.pi * 0.6 ** 2 / WAVE_COVER)
+    return max(ARENA_SIZE, 2 * math.ceil(side / 2))
+
+def set_arena(size):
+    """Resize the floor and boundary walls; the world is rebuilt and rebaked on the next frame."""
+    global grid_size, world
+    if size == grid_size:
+        return
+    grid_size = size
+    if world is not None:
+        world.invalidate()
+        world = build_world()
+
+def spawn_wave():
+    """Spawn the next, bigger wave spread along the inside of the boundary walls."""
+    global wave
+    wave += 1
+    count = min(int(WAVE_FIRST * WAVE_GROWTH ** (wave - 1)), WAVE_MAX)
+    set_arena(arena_size(count))
+    half = grid_size/2 - 1
+    for _ in range(count):
+        along = random.uniform(-half, half)
+        side = random.choice((-half, half))
+        if random.random() < 0.5:
+            spawn_enemy(along, side)
+        else:
+            spawn_enemy(side, along)
 
-def draw_enemy(x, y, z, size):
+def reset_enemies():
+    global wave
+    enemies.clear()
+    wave = 0
+    if wave_mode:
+        spawn_wave()
+    else:
+        set_arena(ARENA_SIZE)
+        for _ in range(5):
+            spawn_enemy()
+
+def colored(color, draw, *args):
+    """Draw callback for a scene node: set `color`, then draw(*args)."""
+    def draw_colored():
+        glColor3f(*color)
+        draw(*args)
+    return draw_colored
+
+def player_transform():
+    return (('translate', *player_pos), ('rotate', player_rotation, 0, 1, 0))
+
+def gun_transform():
+    return (('translate', 0, 0, 0.5), ('rotate', gun_rotation, 0, 1, 0))  # End of arm, then gun rotation
+
+def build_player(level):
+    """Player model at one detail level; only the player and gun transforms change per frame."""
+    head_slices, limb_slices = PLAYER_LODS[level]
+    skin = (0.8, 0.6, 0.4)
+    
+    # GUN - Combination of cylinder and cuboid; the handle is too small to see at the coarsest level
+    gun = Node(colored((0.3, 0.3, 0.3), glutSolidCylinder, 0.05, 0.7, limb_slices, 1), gun_transform)
+    if level < len(PLAYER_LODS) - 1:
+        gun.add(Node(colored((0.2, 0.2, 0.2), glutSolidCube, 1.0),
+                     (('translate', 0, -0.1, 0.35), ('scale', 0.2, 0.15, 0.4))))
+    
+    return Node(transform=player_transform, children=[
+        # HEAD - Sphere (size: 0.25 units)
+        Node(colored(skin, glutSolidSphere, 0.25, head_slices, head_slices), (('translate', 0, 1.75, 0),)),
+        # BODY - Cuboid (size: 0.5w × 1.0h × 0.3d)
+        Node(colored((0.1, 0.3, 0.8), glutSolidCube, 1.0), (('translate', 0, 1.0, 0), ('scale', 0.5, 1.0, 0.3))),
+        # LEGS - Two Cylinders
+        Node(colored((0.2, 0.2, 0.2), glutSolidCylinder, 0.12, 0.8, limb_slices, 1), (('translate', -0.15, 0.5, 0),)),
+        Node(colored((0.2, 0.2, 0.2), glutSolidCylinder, 0.12, 0.8, limb_slices, 1), (('translate', 0.15, 0.5, 0),)),
+        # ARMS - Two Cylinders, the right one holding the gun
+        Node(colored(skin, glutSolidCylinder, 0.08, 0.5, limb_slices, 1),
+             (('translate', -0.35, 1.25, 0), ('rotate', 90, 0, 1, 0))),
+        Node(colored(skin, glutSolidCylinder, 0.08, 0.5, limb_slices, 1),
+             (('translate', 0.35, 1.25, 0), ('rotate', 90, 0, 1, 0)), [gun]),
+    ])
+
+def draw_enemy(x, y, z, size, level=0):
+    slices, stacks, eye_slices = ENEMY_LODS[level]
     glPushMatrix()
     glTranslatef(x, y, z)
     
     # Main body - Sphere
     glColor3f(0.2, 0.8, 0.2)
-    glutSolidSphere(size, 20, 20)
+    spheres.draw(size, slices, stacks)
     
     # Eye - Smaller sphere
-    glColor3f(1, 1, 1)
-    glTranslatef(0, 0, size)
-    glutSolidSphere(size/3, 10, 10)
+    if eye_slices:
+        glColor3f(1, 1, 1)
+        glTranslatef(0, 0, size)
+        spheres.draw(size/3, eye_slices, eye_slices)
     
     glPopMatrix()
 
+def update_lods():
+    """Pick each enemy's and the player's detail level from their distance to the camera eye."""
+    global player_lod
+    ex, ey, ez = view_eye
+    dist = np.sqrt((enemies.column('x') - ex)**2 + (enemies.column('y') - ey)**2 +
+                   (enemies.column('z') - ez)**2)
+    lod = enemies.column('lod')
+    lod[:] = select_levels(lod, dist, ENEMY_LOD_DISTANCES)
+    dist = math.hypot(player_pos[0] - ex, player_pos[1] + 1 - ey, player_pos[2] - ez)
+    player_lod = select_levels(player_lod, dist, PLAYER_LOD_DISTANCES)
+
 def draw_bullet(x, y, z):
     glPushMatrix()
     glTranslatef(x, y, z)
@@ -149,112 +225,78 @@ def draw_bullet(x, y, z):
     glutSolidCube(0.1)
     glPopMatrix()
 
-def draw_grid():
-    cell_size = grid_size / 10
-    half = grid_size / 2
-    
-    glColor3f(0.5, 0.5, 0.5)
-    glBegin(GL_LINES)
-    
-    # Grid lines
-    for i in range(11):
-        pos = -half + i*cell_size
-        glVertex3f(pos, 0, -half)
-        glVertex3f(pos, 0, half)
-        glVertex3f(-half, 0, pos)
-        glVertex3f(half, 0, pos)
-    
-    # Boundaries
-    glColor3f(0.8, 0.8, 0.8)
-    height = 1.0
-    for boundary in [(-half, half), (half, half), (-half, -half), (half, -half)]:
-        x, z = boundary
-        glVertex3f(x, 0, z)
-        glVertex3f(x, height, z)
-    
-    glEnd()
+def update(steps):
+    profiler.start()
+    for _ in range(steps):
+        update_game()
+    profiler.stop('update')
 
-def update_game(value=0):
+def update_game():
     global player_life, score, bullets_missed, game_over
     
     if not game_over:
-        # Update enemies
-        for enemy in enemies[:]:
-            # Movement
-            dx = player_pos[0] - enemy['x']
-            dz = player_pos[2] - enemy['z']
-            dist = math.sqrt(dx*dx + dz*dz)
-            
-            if dist > 0.5:
-                enemy['x'] += dx/dist * enemy['speed']
-                enemy['z'] += dz/dist * enemy['speed']
-            
-            # Pulsing effect
-            if enemy['growing']:
-                enemy['size'] += 0.005
-                if enemy['size'] > 0.6:
-                    enemy['growing'] = False
-            else:
-                enemy['size'] -= 0.005
-                if enemy['size'] < 0.3:
-                    enemy['growing'] = True
-            
-            # Collision with player
-            if dist < 0.8:
-                player_life -= 1
-                if player_life <= 0:
-                    game_over = True
-                enemy['x'] = random.uniform(-8, 8)
-                enemy['z'] = random.uniform(-8, 8)
+        # Update enemies; the spatial hash keeps separation, contact and hits near-linear
+        enemies.pursue(player_pos[0], player_pos[2])
+        enemies.pulse()
+        enemies.separate()
+        enemies.confine(grid_size/2 - 0.5)
+        grid = SpatialHash(enemies.column('x'), enemies.column('z'))
+        
+        # Collision with player
+        touching = enemies.contacts(grid, player_pos[0], player_pos[2])
+        half = grid_size/2 - 2
+        for i in touching.tolist():
+            player_life -= 1
+            if player_life <= 0:
+                game_over = True
+            enemies.column('x')[i] = random.uniform(-half, half)
+            enemies.column('z')[i] = random.uniform(-half, half)
+        if len(touching):
+            # Rehash so bullets find the teleported enemies at their new positions
+            grid = SpatialHash(enemies.column('x'), enemies.column('z'))
         
         # Update bullets
-        for bullet in bullets[:]:
-            bullet['x'] += bullet['dx']
-            bullet['z'] += bullet['dz']
-            bullet['distance'] += 0.2
-            
-            # Check hits
-            hit = False
-            for enemy in enemies[:]:
-                dist = math.sqrt((bullet['x']-enemy['x'])**2 + 
-                               (bullet['z']-enemy['z'])**2)
-                if dist < enemy['size'] + 0.1:
-                    enemies.remove(enemy)
-                    spawn_enemy()
-                    score += 10
-                    hit = True
-                    break
-            
-            if hit:
-                bullets.remove(bullet)
-            elif bullet['distance'] > 30:
-                bullets.remove(bullet)
-                bullets_missed += 1
-                if bullets_missed >= 10:
-                    game_over = True
+        bullets.advance()
+        hit_bullets, hit_enemies = find_hits(bullets, enemies, grid)  # Swept over the whole move
+        score += 10 * len(hit_enemies)
+        expired = bullets.expired()
+        expired[hit_bullets] = False
+        missed = int(np.count_nonzero(expired))
+        if missed:
+            bullets_missed += missed
+            if bullets_missed >= 10:
+                game_over = True
+        bullets.remove(np.concatenate((hit_bullets, np.flatnonzero(expired))))
+        enemies.remove(hit_enemies)
+        if not wave_mode:
+            for _ in range(len(hit_enemies)):
+                spawn_enemy()
+        elif not len(enemies):
+            spawn_wave()
         
         # Cheat mode
         if cheat_mode:
             global gun_rotation
             gun_rotation += 5
             
-            # Auto-fire
-            for enemy in enemies:
-                angle = math.degrees(math.atan2(
-                    enemy['x']-player_pos[0], 
-                    enemy['z']-player_pos[2]))
-                if abs((player_rotation + gun_rotation - angle) % 360) < 15:
-                    fire_bullet()
-                    break
-    
-    glutPostRedisplay()
-    glutTimerFunc(16, update_game, 0)
+            # Auto-fire at the nearest enemy in the gun cone, aimed where it will be
+            target = nearest_in_cone(enemies, player_pos[0], player_pos[2],
+                                     (player_rotation + gun_rotation) % 360, AUTO_AIM_CONE)
+            if target >= 0:
+                ex = enemies.column('x')[target]
+                ez = enemies.column('z')[target]
+                dist = math.hypot(ex - player_pos[0], ez - player_pos[2])
+                speed = enemies.column('speed')[target] / dist if dist > 0.5 else 0.0
+                lx, lz = lead_point(ex, ez, (player_pos[0] - ex) * speed, (player_pos[2] - ez) * speed,
+                                    player_pos[0], player_pos[2], BULLET_SPEED)
+                fire_bullet(heading(lx - player_pos[0], lz - player_pos[2]) - player_rotation)
 
-def fire_bullet():
+def fire_bullet(aim=None):
+    """Fire from the gun barrel, along the gun or at `aim` degrees from the player's facing."""
     if game_over:
         return
     
-    angle = math.radians(player_rotation + gun_rotation)
+    angle = math.radians(player_rotation + (gun_rotation if aim is None else aim))
     
     # Calculate bullet starting position (from gun barrel)
     bullet_x = player_pos[0] + 0.35 + math.sin(math.radians(player_rotation)) * 0.5
@@ -262,16 +304,11 @@ def fire_bullet():
     bullet_x -= math.sin(angle) * 0.7  # Adjust for gun length
     bullet_z -= math.cos(angle) * 0.7
     
-    bullets.append({
-        'x': bullet_x,
-        'y': player_pos[1] + 1.25,  # Gun height
-        'z': bullet_z,
-        'dx': -math.sin(angle) * 0.3,
-        'dz': -math.cos(angle) * 0.3,
-        'distance': 0
-    })
+    bullet_y = player_pos[1] + 1.25  # Gun height
+    bullets.fire(bullet_x, bullet_y, bullet_z, -math.sin(angle) * BULLET_SPEED, -math.cos(angle) * BULLET_SPEED)
 
 def display():
+    global view_eye
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
     
@@ -284,68 +321,72 @@ def display():
         look_x = eye_x - math.sin(math.radians(player_rotation + gun_rotation))
         look_z = eye_z - math.cos(math.radians(player_rotation + gun_rotation))
         gluLookAt(eye_x, eye_y, eye_z, look_x, eye_y, look_z, 0, 1, 0)
+        view_eye = (eye_x, eye_y, eye_z)
     else:
         # Third-person view
         rad = math.radians(camera_angle)
         eye_x = player_pos[0] + camera_distance * math.sin(rad)
         eye_z = player_pos[2] + camera_distance * math.cos(rad)
         gluLookAt(eye_x, camera_height, eye_z, *player_pos, 0, 1, 0)
+        view_eye = (eye_x, camera_height, eye_z)
     
     # Projection
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(45, (glutGet(GLUT_WINDOW_WIDTH)/glutGet(GLUT_WINDOW_HEIGHT)), 0.1, 100)
+    gluPerspective(45, window_width/window_height, 0.1, max(100, 1.5 * grid_size + camera_distance))  # Far walls of a grown arena stay in view
     glMatrixMode(GL_MODELVIEW)
     
     # Draw scene
-    draw_grid()
-    draw_player()
+    profiler.start()
+    world.render()
+    profiler.stop('grid')
+    update_lods()
+    player_models[int(player_lod[0])].render()
     
-    for enemy in enemies:
-        draw_enemy(enemy['x'], enemy['y'], enemy['z'], enemy['size'])
+    for x, y, z, size, growing, speed, lod in enemies:
+        draw_enemy(x, y, z, size, int(lod))
     
-    for bullet in bullets:
-        draw_bullet(bullet['x'], bullet['y'], bullet['z'])
+    alpha = scheduler.alpha  # Bullets are drawn where they are part way into the next tick
+    for x, y, z, dx, dz, distance in bullets:
+        draw_bullet(x + dx*alpha, y, z + dz*alpha)
+    profiler.stop('entities')
     
     # HUD
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, glutGet(GLUT_WINDOW_WIDTH), 0, glutGet(GLUT_WINDOW_HEIGHT))
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    
-    glColor3f(1, 1, 1)
-    render_text(10, glutGet(GLUT_WINDOW_HEIGHT)-20, f"Lives: {player_life}")
-    render_text(10, glutGet(GLUT_WINDOW_HEIGHT)-40, f"Score: {score}")
-    render_text(10, glutGet(GLUT_WINDOW_HEIGHT)-60, f"Missed: {bullets_missed}")
+    render_text(10, window_height-20, f"Lives: {player_life}")
+    render_text(10, window_height-40, f"Score: {score}")
+    render_text(10, window_height-60, f"Missed: {bullets_missed}")
+    if wave_mode:
+        render_text(10, window_height-80, f"Wave {wave}: {len(enemies)} enemies left")
     
     if game_over:
-        glColor3f(1, 0, 0)
-        render_text(glutGet(GLUT_WINDOW_WIDTH)//2-50, glutGet(GLUT_WINDOW_HEIGHT)//2, "GAME OVER")
-        glColor3f(1, 1, 1)
-        render_text(glutGet(GLUT_WINDOW_WIDTH)//2-70, glutGet(GLUT_WINDOW_HEIGHT)//2-30, "Press R to restart")
+        render_text(window_width//2-50, window_height//2, "GAME OVER", (1, 0, 0))
+        render_text(window_width//2-70, window_height//2-30, "Press R to restart")
     
     if cheat_mode:
-        glColor3f(0, 1, 0)
-        render_text(glutGet(GLUT_WINDOW_WIDTH)-150, glutGet(GLUT_WINDOW_HEIGHT)-20, "CHEAT MODE")
+        render_text(window_width-150, window_height-20, "CHEAT MODE", (0, 1, 0))
     
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    for i, line in enumerate(profiler.lines()):
+        render_text(10, window_height-100-20*i, line, (1, 1, 0))
+    hud.draw()
+    profiler.stop('hud')
     
     glutSwapBuffers()
+    profiler.stop('swap')
+    profiler.end_frame()
+
+def render_text(x, y, text, color=(1, 1, 1)):
+    # Queued and drawn with the rest of the HUD by hud.draw()
+    hud.add(x, y, text, GLUT_BITMAP_HELVETICA_18, color)
 
-def render_text(x, y, text):
-    glRasterPos2f(x, y)
-    for char in text:
-        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(char))
+def reshape(width, height):
+    global window_width, window_height
+    window_width, window_height = width, max(height, 1)
+    hud.resize(window_width, window_height)
+    glViewport(0, 0, width, height)
 
 def keyboard(key, x, y):
     global player_rotation, gun_rotation, camera_angle, camera_height
-    global cheat_mode, first_person, game_over
+    global cheat_mode, first_person, game_over, wave_mode
     global player_life, score, bullets_missed, player_pos
     
     key = key.decode('utf-8').lower()
@@ -361,6 +402,9 @@ def keyboard(key, x, y):
         player_pos[0] += math.sin(rad) * 0.5
         player_pos[2] += math.cos(rad) * 0.5
     elif key == 'c': cheat_mode = not cheat_mode
+    elif key == 'v':
+        wave_mode = not wave_mode
+        reset_enemies()
     elif key == 'r' and game_over:
         # Reset game
         player_life = 5
@@ -371,8 +415,7 @@ def keyboard(key, x, y):
         player_rotation = 0
         gun_rotation = 0
         bullets.clear()
-        enemies.clear()
-        for _ in range(5): spawn_enemy()
+        reset_enemies()
     
     glutPostRedisplay()
 
@@ -395,56 +438,13 @@ def mouse(button, state, x, y):
     
     glutPostRedisplay()
 
-# ... [imports and initializations remain unchanged]
-
-# Add this new function for drawing boundary walls
-def draw_boundary_walls():
-    wall_height = 2.0
-    wall_thickness = 0.2
-    half = grid_size / 2
-
-    glColor3f(0.3, 0.3, 0.3)  # Wall color
-    glPushMatrix()
-
-    # Front wall (positive Z)
-    glPushMatrix()
-    glTranslatef(0, wall_height / 2, half)
-    glScalef(grid_size, wall_height, wall_thickness)
-    glutSolidCube(1.0)
-    glPopMatrix()
-
-    # Back wall (negative Z)
-    glPushMatrix()
-    glTranslatef(0, wall_height / 2, -half)
-    glScalef(grid_size, wall_height, wall_thickness)
-    glutSolidCube(1.0)
-    glPopMatrix()
-
-    # Left wall (negative X)
-    glPushMatrix()
-    glTranslatef(-half, wall_height / 2, 0)
-    glScalef(wall_thickness, wall_height, grid_size)
-    glutSolidCube(1.0)
-    glPopMatrix()
-
-    # Right wall (positive X)
-    glPushMatrix()
-    glTranslatef(half, wall_height / 2, 0)
-    glScalef(wall_thickness, wall_height, grid_size)
-    glutSolidCube(1.0)
-    glPopMatrix()
-
-    glPopMatrix()
-
-# Update this function to call wall drawing
-def draw_grid():
-    cell_size = grid_size / 10
+def draw_grid_lines():
+    cell_size = 2
     half = grid_size / 2
 
-    # Grid lines
     glColor3f(0.5, 0.5, 0.5)
     glBegin(GL_LINES)
-    for i in range(11):
+    for i in range(int(grid_size / cell_size) + 1):
         pos = -half + i*cell_size
         glVertex3f(pos, 0, -half)
         glVertex3f(pos, 0, half)
@@ -452,23 +452,36 @@ def draw_grid():
         glVertex3f(half, 0, pos)
     glEnd()
 
-    # Draw boundary walls as 3D objects
-    draw_boundary_walls()
+def build_world():
+    """Grid and boundary walls; nothing in it moves, so it bakes into a single display list."""
+    wall_height = 2.0
+    wall_thickness = 0.2
+    half = grid_size / 2
+    wall = colored((0.3, 0.3, 0.3), glutSolidCube, 1.0)
+    return Node(draw_grid_lines, children=[
+        Node(wall, (('translate', 0, wall_height / 2, half), ('scale', grid_size, wall_height, wall_thickness))),
+        Node(wall, (('translate', 0, wall_height / 2, -half), ('scale', grid_size, wall_height, wall_thickness))),
+        Node(wall, (('translate', -half, wall_height / 2, 0), ('scale', wall_thickness, wall_height, grid_size))),
+        Node(wall, (('translate', half, wall_height / 2, 0), ('scale', wall_thickness, wall_height, grid_size))),
+    ])
 
 
 def main():
+    global scheduler
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
-    glutInitWindowSize(800, 600)
+    glutInitWindowSize(window_width, window_height)
     glutCreateWindow(b"Bullet Frenzy - 3D Game")
     
     init()
     
-    glutDisplayFunc(display)
+    scheduler = FrameScheduler(update, TICK, TARGET_FPS, MAX_CPU)
+    glutDisplayFunc(scheduler.wrap_display(display))
+    glutReshapeFunc(reshape)
     glutKeyboardFunc(keyboard)
     glutSpecialFunc(special_keys)
     glutMouseFunc(mouse)
-    glutTimerFunc(0, update_game, 0)
+    scheduler.start()
     
     glutMainLoop()
 
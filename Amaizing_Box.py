@@ -2,7 +2,9 @@ from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import random
-import time
+
+from frame_profiler import make_profiler
+from frame_scheduler import FrameScheduler
 
 # Global variables
 width, height = 800, 600
@@ -10,6 +12,13 @@ points = []
 blinking = False
 frozen = False
 speed_factor = 0.01
+tick = 0.05  # Fixed update step: points move and blink 20 times a second
+target_fps = 60
+max_cpu = 1.0  # Fraction of wall time frames may spend updating and drawing
+scheduler = None
+
+# Frame phase timing, shown as an overlay when FRAME_PROFILE is set
+profiler = make_profiler(('update', 'points', 'hud', 'swap'))
 
 
 class Point:
@@ -35,30 +44,48 @@ class Point:
     def draw(self):
         if blinking and not self.blink_state:
             return
+        # Drawn the part of a tick ahead that has passed since the last move
+        alpha = 0 if frozen else scheduler.alpha * speed_factor
         glColor3f(*self.color)
         glBegin(GL_POINTS)
-        glVertex2f(self.x, self.y)
+        glVertex2f(self.x + self.dx * alpha, self.y + self.dy * alpha)
         glEnd()
 
     def toggle_blink(self):
         self.blink_state = not self.blink_state
 
 
+def draw_text(x, y, text):
+    """Profiler overlay text at pixel position (x, y) from the bottom left."""
+    glColor3f(1, 1, 1)
+    glRasterPos2f(2 * x / width - 1, 2 * y / height - 1)
+    for ch in text:
+        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_12, ord(ch))
+
+
 def display():
+    profiler.start()
     glClear(GL_COLOR_BUFFER_BIT)
     for point in points:
         point.draw()
+    profiler.stop('points')
+    for i, line in enumerate(profiler.lines()):
+        draw_text(10, height - 20 - 16 * i, line)
+    profiler.stop('hud')
     glutSwapBuffers()
+    profiler.stop('swap')
+    profiler.end_frame()
 
 
-def idle():
-    if not frozen:
-        for point in points:
-            point.move()
-            if blinking:
-                point.toggle_blink()
-    glutPostRedisplay()
-    time.sleep(0.05)
+def update(steps):
+    profiler.start()
+    for _ in range(steps):
+        if not frozen:
+            for point in points:
+                point.move()
+                if blinking:
+                    point.toggle_blink()
+    profiler.stop('update')
 
 
 def mouse(button, state, x, y):
@@ -94,16 +121,18 @@ def init():
 
 
 def main():
+    global scheduler
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB)
     glutInitWindowSize(width, height)
     glutCreateWindow(b"Task 2: Amazing Box")
     init()
-    glutDisplayFunc(display)
-    glutIdleFunc(idle)
+    scheduler = FrameScheduler(update, tick, target_fps, max_cpu)
+    glutDisplayFunc(scheduler.wrap_display(display))
     glutMouseFunc(mouse)
     glutKeyboardFunc(keyboard)
     glutSpecialFunc(keyboard)
+    scheduler.start()
     glutMainLoop()
 
 
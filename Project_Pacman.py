@@ -1,247 +1,251 @@
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
+import argparse
+import atexit
 import math
 import random
 import time
 
+from frame_profiler import make_profiler
+from frame_scheduler import FrameScheduler
+from hud_text import TextCache
+from pacman_batch import InstanceBatch, cube_mesh, entity_positions, sphere_mesh
+from pacman_maze import MazeData, WallCuller
+from pacman_replay import KEY, MOUSE, SPECIAL, Recorder, Recording
+from pacman_rollback import RollbackSession
+from pacman_sim import FIRE, TICK, PacmanSim
+from scene_graph import Node
+
 # Camera-related variables
 camera_pos = (0, 0, 300)
 camera_angle = 0
 camera_height = 300
 camera_mode = 'third'
 
-# Game state variables
-player_pos = [50, 50, 20]  # Player position (x, y, z) in maze
-player_angle = 0
-life = 5
-score = 0
-bullets_missed = 0
-game_over = False
-
-# Maze and game constants
-MAZE_SIZE = 600
-WALL_HEIGHT = 50
+# Rendering constants
 fovY = 90  # Reduced FOV for maze navigation
-BULLET_SPEED = 3
-ENEMY_SPEED = 0.5
-ENEMY_COUNT = 4
-POWERUP_COUNT = 2
-
-# Game objects
-bullets = []  # [x, y, z, angle]
-enemies = []  # [x, y, z]
-powerups = []  # [x, y, z]
-last_time = time.time()
-
-# Maze layout: list of [x1, y1, x2, y2, height] for walls
-maze_walls = [
-    # Outer walls
-    [-300, -300, 300, -300, WALL_HEIGHT],  # Bottom
-    [-300, 300, 300, 300, WALL_HEIGHT],    # Top
-    [-300, -300, -300, 300, WALL_HEIGHT],  # Left
-    [300, -300, 300, 300, WALL_HEIGHT],    # Right
-    # Inner walls (simple maze layout)
-    [-100, -300, -100, 100, WALL_HEIGHT],  # Vertical left
-    [100, -100, 100, 300, WALL_HEIGHT],    # Vertical right
-    [-300, 0, 0, 0, WALL_HEIGHT],          # Horizontal middle-left
-    [100, 100, 300, 100, WALL_HEIGHT],     # Horizontal top-right
-]
+ASPECT = 1.25
+CULL_WALLS = True  # Frustum/occlusion culling of maze walls in first-person mode
+USE_ENTITY_ARRAYS = False  # Batched NumPy update path for bullets/enemies
+MAX_FRAME_TIME = 0.25  # Cap on simulated time per frame after a stall
+TARGET_FPS = 60
+MAX_CPU = 1.0  # Fraction of wall time frames may spend updating and drawing
+maze_file = None  # Optional .npz maze written by pacman_maze.MazeData.save
+seed = None  # RNG seed of the game; drawn at random when recording without --seed
+REPLAY_TICKS_PER_FRAME = 8  # Simulation ticks per redraw when replaying with rendering
+
+# Headless game state; this module only draws it and feeds it input
+sim = None
+pending_inputs = []
+scheduler = None
+prev_player = None  # Player position and angle before the last tick, for interpolation
+tick_count = 0  # Simulation steps since start; recorded events are stamped with it
+
+# Frame phase timing, shown as an overlay when FRAME_PROFILE is set
+profiler = make_profiler(('update', 'maze', 'entities', 'hud', 'swap'))
+
+# Input recording and replay (pacman_replay)
+recorder = None
+replay = None
+replay_index = 0
+replay_start = None
+
+# Two-player netplay over UDP (pacman_rollback); None when playing alone
+session = None
+
+# Maze geometry in a vertex buffer, its culler and the sim.maze_version they were built from
+maze_vbo = None
+maze_vertex_count = 0
+maze_culler = None
+maze_version = None
+
+# Cached entity meshes, each drawn once per frame at all positions of its type
+enemy_batch = InstanceBatch(sphere_mesh(15))
+powerup_batch = InstanceBatch(cube_mesh(10))
+bullet_batch = InstanceBatch(cube_mesh(8))
+player_quadric = None
+
+# Retained scene, built by build_scene(). The maze is one buffer draw and everything
+# else moves, so every node is dynamic; static scenery would bake into a display list.
+world = None
+actors = None
+
+# HUD lines, compiled once per distinct text, in a 1000x800 screen space
+hud = TextCache(1000, 800)
+
+# First-person eye and horizontal view direction, set by setupCamera
+view_eye = None
+view_forward = None
 
 def init_game():
     """Initialize or reset game state."""
-    global player_pos, player_angle, life, score, bullets_missed, game_over, bullets, enemies, powerups, camera_mode, camera_pos, camera_height, camera_angle
-    player_pos = [50, 50, 20]
-    player_angle = 0
-    life = 5
-    score = 0
-    bullets_missed = 0
-    game_over = False
+    global sim, camera_mode, camera_pos, camera_height, camera_angle, prev_player
     camera_mode = 'third'
+    prev_player = None
     camera_pos = (0, 0, 300)
     camera_height = 300
     camera_angle = 0
-    bullets = []
-    enemies = []
-    powerups = []
-    for _ in range(ENEMY_COUNT):
-        spawn_enemy()
-    for _ in range(POWERUP_COUNT):
-        spawn_powerup()
-
-def spawn_enemy():
-    """Spawn an enemy at a random valid position within maze borders."""
-    while True:
-        x = random.uniform(-290, 290)  # Within maze borders (-300 + 10, 300 - 10)
-        y = random.uniform(-290, 290)
-        if is_valid_position(x, y, 20) and math.hypot(x - player_pos[0], y - player_pos[1]) > 100:
-            enemies.append([x, y, 20])
-            break
-
-def spawn_powerup():
-    """Spawn a power-up at a random valid position."""
-    while True:
-        x = random.uniform(-290, 290)
-        y = random.uniform(-290, 290)
-        if is_valid_position(x, y, 10):
-            powerups.append([x, y, 20])
-            break
-
-def is_valid_position(x, y, radius):
-    """Check if position is valid (no collision with walls)."""
-    for wall in maze_walls:
-        x1, y1, x2, y2, _ = wall
-        if x1 == x2:  # Vertical wall
-            if abs(x - x1) < radius and min(y1, y2) - radius < y < max(y1, y2) + radius:
-                return False
-        elif y1 == y2:  # Horizontal wall
-            if abs(y - y1) < radius and min(x1, x2) - radius < x < max(x1, x2) + radius:
-                return False
-    return True
+    if sim is None:
+        maze = MazeData.load(maze_file) if maze_file else None
+        sim = PacmanSim(seed=seed, use_arrays=USE_ENTITY_ARRAYS, maze=maze)
+    else:
+        sim.reset()
+    if world is None:
+        build_scene()
 
 def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    glColor3f(1, 1, 1)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    """Queue a HUD line; hud.draw() draws all queued lines at the end of the frame."""
+    hud.add(x, y, text, font)
+
+def player_transform():
+    pos, angle = view_player()
+    steps = (('translate', *pos), ('rotate', angle, 0, 0, 1))
+    if sim.game_over:
+        steps += (('rotate', 90, 1, 0, 0),)  # Lie flat
+    return steps
 
 def draw_player():
-    """Draw Pacman with animated mouth."""
-    glPushMatrix()
-    glTranslatef(player_pos[0], player_pos[1], player_pos[2])
-    glRotatef(player_angle, 0, 0, 1)
-    
-    if game_over:
-        glRotatef(90, 1, 0, 0)  # Lie flat
-    
+    """Draw Pacman with animated mouth, in the space set up by player_transform."""
+    global player_quadric
     # Pacman: yellow sphere with animated mouth
     glColor3f(1, 1, 0)  # Yellow
     mouth_angle = 45 + 15 * math.sin(time.time() * 5)  # Animate mouth (30–60 degrees)
-    quad = gluNewQuadric()
-    gluPartialDisk(quad, 0, 20, 20, 20, mouth_angle / 2, 360 - mouth_angle)  # Wedge shape
-    glPopMatrix()
-
-def draw_enemy(x, y, z):
-    """Draw an enemy as a red sphere."""
-    glPushMatrix()
-    glTranslatef(x, y, z)
-    glColor3f(1, 0, 0)
-    gluSphere(gluNewQuadric(), 15, 10, 10)
-    glPopMatrix()
+    if player_quadric is None:
+        player_quadric = gluNewQuadric()
+    gluPartialDisk(player_quadric, 0, 20, 20, 20, mouth_angle / 2, 360 - mouth_angle)  # Wedge shape
+
+def draw_batch(batch, entities, scale=1.0):
+    """Draw one instance of `batch`'s mesh at every entity position with a single call."""
+    positions = entity_positions(entities)
+    if not len(positions):
+        return
+    vertices, indices = batch.build(positions, scale)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, vertices)
+    glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, indices)
+    glDisableClientState(GL_VERTEX_ARRAY)
 
-def draw_powerup(x, y, z):
-    """Draw a power-up as a green cube."""
-    glPushMatrix()
-    glTranslatef(x, y, z)
+def draw_entities():
+    """Draw enemies as red spheres, power-ups as green cubes and bullets as white cubes."""
+    pulse = 1.0 + 0.2 * math.sin(time.time() * 5)  # Pulsing effect
+    glColor3f(1, 0, 0)
+    draw_batch(enemy_batch, sim.enemies)
     glColor3f(0, 1, 0)
-    scale = 1.0 + 0.2 * math.sin(time.time() * 5)  # Pulsing effect
-    glScalef(scale, scale, scale)
-    glutSolidCube(10)
-    glPopMatrix()
+    draw_batch(powerup_batch, sim.powerups, pulse)
+    glColor3f(1, 1, 1)
+    draw_batch(bullet_batch, sim.bullets, pulse)
+
+def build_scene():
+    global world, actors
+    world = Node(draw_maze, dynamic=True)
+    actors = Node(children=[
+        Node(draw_player, player_transform, dynamic=True),
+        Node(draw_entities, dynamic=True),
+    ])
+
+def build_maze_buffer():
+    """Upload the merged wall mesh of the current maze into a vertex buffer."""
+    global maze_vbo, maze_vertex_count, maze_culler, maze_version
+    if maze_vbo is not None:
+        glDeleteBuffers(1, [maze_vbo])
+    vertices = sim.maze.mesh
+    maze_vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, maze_vbo)
+    glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    maze_vertex_count = len(vertices)
+    maze_culler = WallCuller(sim.walls, sim.maze.mesh_owners)
+    maze_version = sim.maze_version
 
 def draw_maze():
-    """Draw the maze walls."""
-    glBegin(GL_QUADS)
+    """Draw the maze walls from the vertex buffer, rebuilding it when the maze changes.
+
+    In first-person mode only walls inside the view frustum and not hidden
+    behind nearer walls are drawn; maze_culler counts them.
+    """
+    if maze_vbo is None or maze_version != sim.maze_version:
+        build_maze_buffer()
+    if not maze_vertex_count:
+        return
     glColor3f(0, 0, 1)  # Blue walls
-    for wall in maze_walls:
-        x1, y1, x2, y2, height = wall
-        if x1 == x2:  # Vertical wall
-            glVertex3f(x1 - 10, y1, 0)
-            glVertex3f(x1 + 10, y1, 0)
-            glVertex3f(x1 + 10, y1, height)
-            glVertex3f(x1 - 10, y1, height)
-            for y in range(int(min(y1, y2)), int(max(y1, y2)), 10):
-                glVertex3f(x1 - 10, y, 0)
-                glVertex3f(x1 + 10, y, 0)
-                glVertex3f(x1 + 10, y, height)
-                glVertex3f(x1 - 10, y, height)
-        elif y1 == y2:  # Horizontal wall
-            glVertex3f(x1, y1 - 10, 0)
-            glVertex3f(x1, y1 + 10, 0)
-            glVertex3f(x1, y1 + 10, height)
-            glVertex3f(x1, y1 - 10, height)
-            for x in range(int(min(x1, x2)), int(max(x1, x2)), 10):
-                glVertex3f(x, y1 - 10, 0)
-                glVertex3f(x, y1 + 10, 0)
-                glVertex3f(x, y1 + 10, height)
-                glVertex3f(x, y1 - 10, height)
-    glEnd()
+    glBindBuffer(GL_ARRAY_BUFFER, maze_vbo)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, None)
+    if CULL_WALLS and camera_mode == 'first':
+        # Column-major GL matrices, so the transposed product maps world points to clip space
+        clip = (glGetDoublev(GL_MODELVIEW_MATRIX) @ glGetDoublev(GL_PROJECTION_MATRIX)).T
+        half_fov = math.atan(math.tan(math.radians(fovY / 2)) * ASPECT)
+        walls = maze_culler.visible(clip, view_eye, view_forward, half_fov)
+        if len(walls):
+            glMultiDrawArrays(GL_QUADS, maze_culler.first[walls], maze_culler.count[walls], len(walls))
+    else:
+        maze_culler.submitted = len(maze_culler.walls)
+        maze_culler.culled = 0
+        glDrawArrays(GL_QUADS, 0, maze_vertex_count)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+def handle_event(kind, value):
+    """Apply one input event; every listener goes through here so events can be recorded and replayed."""
+    global camera_height, camera_angle, camera_mode
+    if recorder is not None:
+        recorder.add(tick_count, kind, value)
+    if kind == KEY:
+        key = bytes((value,))
+        if sim.game_over:
+            if key == b'r' and session is not None:
+                pending_inputs.append(key)  # Both peers must restart on the same tick
+            elif key == b'r':
+                init_game()
+            return
+        if key in (b'w', b's', b'a', b'd'):
+            pending_inputs.append(key)
+    elif kind == SPECIAL:
+        if sim.game_over:
+            return
+        if value == GLUT_KEY_UP:
+            camera_height = min(camera_height + 10, 600)
+        if value == GLUT_KEY_DOWN:
+            camera_height = max(camera_height - 10, 100)
+        if value == GLUT_KEY_LEFT:
+            camera_angle = (camera_angle + 5) % 360
+        if value == GLUT_KEY_RIGHT:
+            camera_angle = (camera_angle - 5) % 360
+    elif kind == MOUSE:
+        if sim.game_over:
+            return
+        button, state = value >> 1, value & 1
+        if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+            pending_inputs.append(FIRE)
+        if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
+            camera_mode = 'first' if camera_mode == 'third' else 'third'
 
 def keyboardListener(key, x, y):
     """Handle keyboard inputs."""
-    global player_pos, player_angle
-    if game_over:
-        if key == b'r':
-            init_game()
-        return
-    
-    speed = 5
-    if key == b'w':  # Move forward
-        rad = math.radians(player_angle)
-        new_x = player_pos[0] + speed * math.sin(rad)
-        new_y = player_pos[1] + speed * math.cos(rad)
-        if is_valid_position(new_x, new_y, 20):
-            player_pos[0] = new_x
-            player_pos[1] = new_y
-    if key == b's':  # Move backward
-        rad = math.radians(player_angle)
-        new_x = player_pos[0] - speed * math.sin(rad)
-        new_y = player_pos[1] - speed * math.cos(rad)
-        if is_valid_position(new_x, new_y, 20):
-            player_pos[0] = new_x
-            player_pos[1] = new_y
-    if key == b'a':  # Turn left (counterclockwise)
-        player_angle = (player_angle + 5) % 360
-    if key == b'd':  # Turn right (clockwise)
-        player_angle = (player_angle - 5) % 360
+    if replay is None:
+        handle_event(KEY, key[0])
 
 def specialKeyListener(key, x, y):
     """Handle arrow keys for camera."""
-    global camera_height, camera_angle
-    if game_over:
-        return
-    if key == GLUT_KEY_UP:
-        camera_height = min(camera_height + 10, 600)
-    if key == GLUT_KEY_DOWN:
-        camera_height = max(camera_height - 10, 100)
-    if key == GLUT_KEY_LEFT:
-        camera_angle = (camera_angle + 5) % 360
-    if key == GLUT_KEY_RIGHT:
-        camera_angle = (camera_angle - 5) % 360
+    if replay is None:
+        handle_event(SPECIAL, key)
 
 def mouseListener(button, state, x, y):
     """Handle mouse inputs."""
-    if game_over:
-        return
-    if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
-        rad = math.radians(player_angle)
-        bx = player_pos[0] + 20 * math.sin(rad)
-        by = player_pos[1] + 20 * math.cos(rad)
-        bz = player_pos[2]
-        bullets.append([bx, by, bz, player_angle])
-    if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
-        global camera_mode
-        camera_mode = 'first' if camera_mode == 'third' else 'third'
+    if replay is None:
+        handle_event(MOUSE, button * 2 + state)
 
 def setupCamera():
     """Configure camera projection and view."""
+    global view_eye, view_forward
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(fovY, 1.25, 0.1, 1500)
+    gluPerspective(fovY, ASPECT, 0.1, 1500)
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
     
+    player_pos, player_angle = view_player()
     if camera_mode == 'third':
         rad = math.radians(camera_angle)
         cx = player_pos[0] + 200 * math.sin(rad)  # Follow player
@@ -257,100 +261,72 @@ def setupCamera():
         ty = player_pos[1] + 100 * math.cos(rad)
         tz = player_pos[2]
         gluLookAt(cx, cy, cz, tx, ty, tz, 0, 0, 1)
+        view_eye = (cx, cy, cz)
+        view_forward = (math.sin(rad), math.cos(rad))
 
-def update_game():
-    """Update game state."""
-    global bullets, enemies, powerups, life, bullets_missed, game_over, score, last_time
-    if game_over:
-        return
-    
-    current_time = time.time()
-    dt = current_time - last_time
-    last_time = current_time
-    
-    # Update bullets
-    new_bullets = []
-    for bullet in bullets:
-        bx, by, bz, angle = bullet
-        rad = math.radians(angle)
-        bx += BULLET_SPEED * math.sin(rad) * dt * 60
-        by += BULLET_SPEED * math.cos(rad) * dt * 60
-        if -MAZE_SIZE < bx < MAZE_SIZE and -MAZE_SIZE < by < MAZE_SIZE and is_valid_position(bx, by, 5):
-            new_bullets.append([bx, by, bz, angle])
-        else:
-            bullets_missed += 1
-            if bullets_missed >= 10:
-                game_over = True
-    bullets = new_bullets
-    
-    # Update enemies
-    for enemy in enemies:
-        ex, ey, ez = enemy
-        dx = player_pos[0] - ex
-        dy = player_pos[1] - ey
-        dist = math.hypot(dx, dy)
-        if dist > 5:
-            dx /= dist
-            dy /= dist
-            new_x = ex + ENEMY_SPEED * dx * dt * 60
-            new_y = ey + ENEMY_SPEED * dy * dt * 60
-            if is_valid_position(new_x, new_y, 15):
-                enemy[0] = new_x
-                enemy[1] = new_y
-    
-    # Check collisions
-    new_enemies = []
-    for enemy in enemies:
-        ex, ey, ez = enemy
-        hit = False
-        bullets_to_remove = []
-        for bullet in bullets:
-            bx, by, bz, _ = bullet
-            if math.hypot(bx - ex, by - ey) < 20 and abs(bz - ez) < 20:
-                hit = True
-                bullets_to_remove.append(bullet)
-                score += 10
-                break
-        if math.hypot(ex - player_pos[0], ey - player_pos[1]) < 35 and abs(ez - player_pos[2]) < 20:
-            life -= 1
-            hit = True
-            if life <= 0:
-                game_over = True
-        if not hit:
-            new_enemies.append(enemy)
-        else:
-            spawn_enemy()
-    for bullet in bullets_to_remove:
-        if bullet in bullets:
-            bullets.remove(bullet)
-    enemies = new_enemies
-    
-    # Check power-up collisions
-    new_powerups = []
-    for powerup in powerups:
-        px, py, pz = powerup
-        if math.hypot(px - player_pos[0], py - player_pos[1]) < 30 and abs(pz - player_pos[2]) < 20:
-            if life < 5:
-                life += 1
-                spawn_powerup()
-        else:
-            new_powerups.append(powerup)
-    powerups = new_powerups
-
-def draw_bullet(x, y, z):
-    """Draw a bullet as a white cube."""
-    glPushMatrix()
-    glTranslatef(x, y, z)
-    glColor3f(1, 1, 1)
-    scale = 1.0 + 0.2 * math.sin(time.time() * 5)
-    glScalef(scale, scale, scale)
-    glutSolidCube(8)
-    glPopMatrix()
+def view_player():
+    """Player position and angle to draw, interpolated between the last two ticks."""
+    if prev_player is None or scheduler is None:
+        return sim.player_pos, sim.player_angle
+    alpha = scheduler.alpha
+    (px, py, pz), prev_angle = prev_player
+    x, y, z = sim.player_pos
+    turn = (sim.player_angle - prev_angle + 180) % 360 - 180
+    return ((px + (x - px) * alpha, py + (y - py) * alpha, pz + (z - pz) * alpha),
+            prev_angle + turn * alpha)
+
+def run_tick():
+    """Advance the simulation by one TICK with the inputs queued since the last one."""
+    global pending_inputs, tick_count, prev_player
+    prev_player = (tuple(sim.player_pos), sim.player_angle)
+    if session is not None:
+        if not session.advance(pending_inputs):
+            return  # Waiting for the peer; keep the inputs for the next try
+    else:
+        sim.step(TICK, pending_inputs)
+    pending_inputs = []
+    tick_count += 1
+
+def replay_events():
+    """Feed the recorded events stamped with the current tick through handle_event."""
+    global replay_index
+    events = replay.events
+    while replay_index < len(events) and events[replay_index][0] <= tick_count:
+        handle_event(*events[replay_index][1:])
+        replay_index += 1
+
+def replay_ticks(count):
+    """Replay up to `count` ticks; returns False once the recording is used up."""
+    for _ in range(count):
+        replay_events()
+        if tick_count >= replay.final_tick:
+            return False
+        run_tick()
+    return True
 
-def idle():
-    """Update game and redraw."""
-    update_game()
-    glutPostRedisplay()
+def finish_replay():
+    """Report replay speed and whether the final state matches the recorded one."""
+    global replay
+    elapsed = time.perf_counter() - replay_start
+    print(f"Replayed {tick_count} ticks in {elapsed:.2f}s ({tick_count / max(elapsed, 1e-9):.0f} ticks/s)")
+    if replay.digest is None:
+        print("Recording has no final state (cut off); nothing to compare")
+    elif replay.digest == sim.state_digest():
+        print("Final state matches the recording")
+    else:
+        print("Final state DIFFERS from the recording")
+    replay = None
+
+def update(steps):
+    """Advance the simulation by the TICK steps the scheduler says are due (a fixed batch when replaying)."""
+    profiler.start()
+    if replay is not None:
+        if not replay_ticks(REPLAY_TICKS_PER_FRAME):
+            finish_replay()
+    else:
+        for _ in range(steps):
+            run_tick()
+    profiler.stop('update')
 
 def showScreen():
     """Render the game scene."""
@@ -360,26 +336,80 @@ def showScreen():
     
     setupCamera()
     
-    draw_maze()
-    draw_player()
-    for enemy in enemies:
-        draw_enemy(*enemy)
-    for powerup in powerups:
-        draw_powerup(*powerup)
-    for bullet in bullets:
-        draw_bullet(bullet[0], bullet[1], bullet[2])
+    profiler.start()
+    world.render()
+    profiler.stop('maze')
+    actors.render()
+    profiler.stop('entities')
     
     # HUD
-    draw_text(10, 770, f"Lives: {life}")
-    draw_text(10, 740, f"Score: {score}")
-    draw_text(10, 710, f"Bullets Missed: {bullets_missed}")
+    draw_text(10, 770, f"Lives: {sim.life}")
+    draw_text(10, 740, f"Score: {sim.score}")
+    draw_text(10, 710, f"Bullets Missed: {sim.bullets_missed}")
     draw_text(10, 680, f"Camera: {'First-Person' if camera_mode == 'first' else 'Third-Person'}")
-    if game_over:
+    draw_text(10, 650, f"Walls: {maze_culler.submitted} drawn / {maze_culler.culled} culled")
+    if session is not None:
+        draw_text(10, 620, f"Netplay: {session.rollbacks} rollbacks, {session.resimulated} ticks re-run, "
+                           f"{session.stalls} stalls, last {session.rollback_time * 1000:.2f} ms")
+    if sim.game_over:
         draw_text(400, 400, "Game Over! Press R to Restart")
+    for i, line in enumerate(profiler.lines()):
+        draw_text(680, 770 - 25 * i, line, GLUT_BITMAP_HELVETICA_12)
+    hud.draw()
+    profiler.stop('hud')
     
     glutSwapBuffers()
+    profiler.stop('swap')
+    profiler.end_frame()
+
+def close_recording():
+    if recorder is not None:
+        recorder.close(tick_count, sim.state_digest())
+
+def start_replay(path):
+    """Load a recording and set up the game exactly as it was recorded."""
+    global replay, replay_start, seed, maze_file, USE_ENTITY_ARRAYS
+    replay = Recording.load(path)
+    seed = replay.seed
+    maze_file = replay.maze_file
+    USE_ENTITY_ARRAYS = replay.use_arrays
+    init_game()
+    replay_start = time.perf_counter()
 
 def main():
+    global maze_file, seed, recorder, scheduler, session
+    parser = argparse.ArgumentParser(description="3D Pacman")
+    parser.add_argument('maze', nargs='?', help=".npz maze written by pacman_maze.py")
+    parser.add_argument('--record', metavar='FILE', help="record all input to FILE")
+    parser.add_argument('--replay', metavar='FILE', help="replay a recording faster than real time")
+    parser.add_argument('--headless', action='store_true', help="replay without opening a window")
+    parser.add_argument('--fps', type=float, default=TARGET_FPS, help="target frame rate")
+    parser.add_argument('--max-cpu', type=float, default=MAX_CPU,
+                        help="fraction of wall time frames may use, e.g. 0.5 on shared machines")
+    parser.add_argument('--netplay', nargs=2, type=int, metavar=('LOCAL_PORT', 'REMOTE_PORT'),
+                        help="play two-player over UDP on localhost with rollback")
+    parser.add_argument('--host', default='127.0.0.1', help="address of both netplay peers")
+    parser.add_argument('--player', type=int, choices=(1, 2), default=1, help="netplay player number")
+    parser.add_argument('--seed', type=int, help="game seed; both netplay peers must use the same one")
+    args = parser.parse_args()
+    maze_file = args.maze
+    seed = args.seed
+    if args.netplay and (args.record or args.replay):
+        parser.error("--netplay cannot be combined with --record or --replay")
+
+    if args.replay and args.headless:
+        start_replay(args.replay)
+        while replay_ticks(10000):
+            pass
+        finish_replay()
+        return
+
+    if args.record:
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        recorder = Recorder(args.record, seed, USE_ENTITY_ARRAYS, maze_file)
+        atexit.register(close_recording)
+
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(1000, 800)
@@ -389,14 +419,23 @@ def main():
     glEnable(GL_DEPTH_TEST)
     glDisable(GL_LIGHTING)
     
-    glutDisplayFunc(showScreen)
+    scheduler = FrameScheduler(update, TICK, args.fps, args.max_cpu, MAX_FRAME_TIME)
+    glutDisplayFunc(scheduler.wrap_display(showScreen))
     glutKeyboardFunc(keyboardListener)
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
     
-    init_game()
+    if args.replay:
+        start_replay(args.replay)
+    else:
+        if args.netplay and seed is None:
+            seed = 0
+        init_game()
+    if args.netplay:
+        session = RollbackSession(sim, args.player - 1, *args.netplay, host=args.host)
+        atexit.register(session.close)
     
+    scheduler.start()
     glutMainLoop()
 
 if __name__ == "__main__":
@@ -4,6 +4,9 @@ from OpenGL.GLU import *
 import random
 import math
 
+from frame_profiler import make_profiler
+from frame_scheduler import FrameScheduler
+
 # Global variables
 width, height = 800, 600
 num_raindrops = 3000
@@ -13,9 +16,16 @@ max_angle = 45  # Maximum slant angle
 angle_step = 2  # Angle increment for each key press
 transition_progress = 0.0  # Tracks the current progress
 transition_speed = 0.01  # Speed of transition
+tick = 1 / 60  # Fixed update step; rain and transitions advance once per tick
+target_fps = 60
+max_cpu = 1.0  # Fraction of wall time frames may spend updating and drawing
+scheduler = None
 current_phase = 0  # Index for the current phase (0-5)
 phases = ["morning", "noon", "afternoon", "evening", "midnight", "early_dawn"]
 
+# Frame phase timing, shown as an overlay when FRAME_PROFILE is set
+profiler = make_profiler(('update', 'scene', 'rain', 'hud', 'swap'))
+
 # Sun and moon positions based on phases
 celestial_positions = {
     "morning": (-0.8, 0.8),
@@ -75,16 +85,20 @@ def draw_house():
     glEnd()
 
 
-# Draw raindrops with slant
+# Draw raindrops with slant, moved on by the part of a tick since the last update
 def draw_raindrops():
     glColor3f(0.0, 0.0, 1.0)
     angle_radians = to_radians(rain_angle)
     x_offset = math.tan(angle_radians) * 0.05
+    alpha = scheduler.alpha
+    glPushMatrix()
+    glTranslatef(math.tan(angle_radians) * 0.02 * alpha, -0.02 * alpha, 0)
     glBegin(GL_LINES)
     for x, y in raindrops:
         glVertex2f(x, y)
         glVertex2f(x + x_offset, y - 0.05)
     glEnd()
+    glPopMatrix()
 
 # Update raindrops' positions
 def update_raindrops():
@@ -130,10 +144,12 @@ def get_background_color():
     elif current_phase == 5:  # Early Dawn
         return [0.3, 0.4, 0.5]
 
-def idle_function():
-    update_raindrops()
-    update_background_color()
-    glutPostRedisplay()
+def update(steps):
+    profiler.start()
+    for _ in range(steps):
+        update_raindrops()
+        update_background_color()
+    profiler.stop('update')
 
 # Keyboard controls
 def keyboard(key, x, y):
@@ -152,22 +168,45 @@ def special_keys(key, x, y):
     elif key == GLUT_KEY_RIGHT:  # Right arrow to increase rightward slant
         rain_angle = min(max_angle, rain_angle + angle_step)
 
+# Profiler overlay text at pixel position (x, y) from the bottom left
+def draw_text(x, y, text):
+    glColor3f(1.0, 1.0, 1.0)
+    glRasterPos2f(2 * x / width - 1, 2 * y / height - 1)
+    for ch in text:
+        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_12, ord(ch))
+
 def display():
+    profiler.start()
     glClear(GL_COLOR_BUFFER_BIT)
     glClearColor(*get_background_color(), 1.0)  # Update background color
     draw_house()
+    profiler.stop('scene')
     draw_raindrops()
+    profiler.stop('rain')
     draw_celestial_body()
+    profiler.stop('scene')
+    for i, line in enumerate(profiler.lines()):
+        draw_text(10, height - 20 - 16 * i, line)
+    profiler.stop('hud')
     glutSwapBuffers()
-
-
-glutInit()
-glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB)
-glutInitWindowSize(width, height)
-glutCreateWindow(b"Rain Simulation with Adjustable Slant")
-glClearColor(0.0, 0.0, 0.2, 1.0)  # Start in midnight mode
-glutDisplayFunc(display)
-glutIdleFunc(idle_function)
-glutKeyboardFunc(keyboard)
-glutSpecialFunc(special_keys)
-glutMainLoop()
\ No newline at end of file
+    profiler.stop('swap')
+    profiler.end_frame()
+
+
+def main():
+    global scheduler
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB)
+    glutInitWindowSize(width, height)
+    glutCreateWindow(b"Rain Simulation with Adjustable Slant")
+    glClearColor(0.0, 0.0, 0.2, 1.0)  # Start in midnight mode
+    scheduler = FrameScheduler(update, tick, target_fps, max_cpu)
+    glutDisplayFunc(scheduler.wrap_display(display))
+    glutKeyboardFunc(keyboard)
+    glutSpecialFunc(special_keys)
+    scheduler.start()
+    glutMainLoop()
+
+
+if __name__ == "__main__":
+    main()
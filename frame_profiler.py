@@ -0,0 +1,95 @@
+import atexit
+import os
+import time
+from collections import deque
+
+# Set FRAME_PROFILE=1 to turn profiling on, FRAME_PROFILE_CSV=path to also log every frame
+PROFILE_ENV = 'FRAME_PROFILE'
+CSV_ENV = 'FRAME_PROFILE_CSV'
+
+
+class FrameProfiler:
+    """Times named phases of each frame and keeps rolling p50/p99 per phase.
+
+    start() starts a lap and stop(name) adds the time since the last
+    start()/stop() to that phase, so consecutive stop() calls time
+    consecutive phases. Phases may be hit several times per frame (update
+    runs in idle callbacks between redraws); end_frame() closes the frame.
+    """
+
+    def __init__(self, phases, window=300, csv_path=None, refresh=30):
+        self.phases = tuple(phases)
+        self.samples = {name: deque(maxlen=window) for name in self.phases + ('frame',)}
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.refresh = refresh  # Frames between recomputing the overlay text
+        self.frames = 0
+        self.lap = time.perf_counter()
+        self.frame_start = self.lap
+        self.cached_lines = []
+        self.csv = None
+        if csv_path:
+            self.csv = open(csv_path, 'w')
+            self.csv.write(','.join(('frame',) + self.phases + ('total',)) + '\n')
+            atexit.register(self.csv.close)
+
+    def start(self):
+        self.lap = time.perf_counter()
+
+    def stop(self, name):
+        now = time.perf_counter()
+        self.current[name] += now - self.lap
+        self.lap = now
+
+    def end_frame(self):
+        """Record the phase times of the finished frame and the total time since the last one."""
+        now = time.perf_counter()
+        total = now - self.frame_start
+        self.frame_start = now
+        for name, seconds in self.current.items():
+            self.samples[name].append(seconds)
+        self.samples['frame'].append(total)
+        if self.csv is not None:
+            row = [self.current[name] * 1000 for name in self.phases] + [total * 1000]
+            self.csv.write(f"{self.frames}," + ','.join(f"{ms:.3f}" for ms in row) + '\n')
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.frames += 1
+
+    def percentiles(self, name):
+        """(p50, p99) in milliseconds over the rolling window of one phase."""
+        ordered = sorted(self.samples[name])
+        if not ordered:
+            return 0.0, 0.0
+        return (ordered[len(ordered) // 2] * 1000,
+                ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000)
+
+    def lines(self):
+        """Overlay text, one line per phase; recomputed every `refresh` frames."""
+        if not self.cached_lines or self.frames % self.refresh == 0:
+            self.cached_lines = []
+            for name in self.phases + ('frame',):
+                p50, p99 = self.percentiles(name)
+                self.cached_lines.append(f"{name}: p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+        return self.cached_lines
+
+
+class NullProfiler:
+    """Stand-in with the FrameProfiler interface that does nothing."""
+
+    def start(self):
+        pass
+
+    def stop(self, name):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def lines(self):
+        return ()
+
+
+def make_profiler(phases):
+    """FrameProfiler when FRAME_PROFILE is set in the environment, NullProfiler otherwise."""
+    if not os.environ.get(PROFILE_ENV):
+        return NullProfiler()
+    return FrameProfiler(phases, csv_path=os.environ.get(CSV_ENV))
@@ -0,0 +1,75 @@
+import math
+import time
+
+from OpenGL.GLUT import *
+
+
+class FrameScheduler:
+    """Fixed-timestep GLUT frame loop with catch-up, render interpolation and precise waits.
+
+    Each frame, update(steps) is called with the number of whole `tick`
+    steps of real time that passed (at most max_frame_time worth after a
+    stall), then a redraw is posted. `alpha` is the fraction of a tick left
+    over, for drawing between the last two simulation states.
+
+    Between frames the loop sleeps in glutTimerFunc, so GLUT keeps handling
+    input, and only spins for the last `spin` seconds to hit the deadline.
+    Frames are paced to target_fps and further stretched so that update plus
+    draw time stays under max_cpu of the wall clock.
+    """
+
+    def __init__(self, update, tick=1 / 60, target_fps=60, max_cpu=1.0, max_frame_time=0.25, spin=0.001):
+        self.update = update
+        self.tick = tick
+        self.target_fps = target_fps
+        self.max_cpu = max_cpu
+        self.max_frame_time = max_frame_time
+        self.spin = spin
+        self.alpha = 0.0
+        self.accumulator = 0.0
+        self.render_time = 0.0
+        self.last_time = None
+        self.deadline = None
+
+    def start(self):
+        """Start the loop; call once after the GLUT window exists."""
+        self.last_time = self.deadline = time.perf_counter()
+        glutTimerFunc(0, self.on_timer, 0)
+
+    def wrap_display(self, display):
+        """Display callback that also measures draw time for the max_cpu budget."""
+        def timed_display():
+            start = time.perf_counter()
+            display()
+            self.render_time = time.perf_counter() - start
+        return timed_display
+
+    def wait(self, delay):
+        # Round up: a sub-millisecond wait truncated to a 0 ms timer would busy-poll
+        # GLUT until the spin window; the spin covers what the rounding overshoots
+        glutTimerFunc(max(math.ceil(delay * 1000), 0), self.on_timer, 0)
+
+    def on_timer(self, value):
+        now = time.perf_counter()
+        if now < self.deadline - self.spin:
+            self.wait(self.deadline - self.spin - now)  # Timer fired early
+            return
+        while now < self.deadline:
+            now = time.perf_counter()
+
+        start = now
+        self.accumulator += min(now - self.last_time, self.max_frame_time)
+        self.last_time = now
+        steps = int(self.accumulator / self.tick)
+        self.accumulator -= steps * self.tick
+        self.alpha = self.accumulator / self.tick
+        self.update(steps)
+        glutPostRedisplay()
+
+        now = time.perf_counter()
+        busy = now - start + self.render_time
+        period = max(1 / self.target_fps, busy / self.max_cpu)
+        self.deadline += period
+        if self.deadline < now:  # Fell behind; don't try to make up lost frames
+            self.deadline = now
+        self.wait(self.deadline - self.spin - now)
@@ -0,0 +1,193 @@
+import numpy as np
+
+from pacman_entities import CellHash, EntityArrays, claim_in_order
+
+ENEMY_CONTACT = 0.8  # Enemies closer than this to the player hurt it
+BULLET_RADIUS = 0.1
+BULLET_RANGE = 30
+# Farthest a bullet can be from an enemy's centre and still hit it: the
+# largest enemy (pulse() overshoots 0.6 by one step) plus the bullet
+BULLET_REACH = 0.605 + BULLET_RADIUS
+# Spatial hash cell size; must cover the widest interaction: two touching enemies
+# (2 * 0.605), a bullet hit (0.605 + BULLET_RADIUS) and player contact
+HASH_CELL = 1.25
+# Half of the 3x3 neighbourhood: every pair of neighbouring cells is visited once, from one side
+HALF_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class EnemyStore(EntityArrays):
+    """3D-Game enemies as [x, y, z, size, growing, speed, lod].
+
+    growing is 1.0 or 0.0; lod is the detail level the enemy was last drawn at.
+    """
+
+    fields = ('x', 'y', 'z', 'size', 'growing', 'speed', 'lod')
+
+    def pursue(self, px, pz):
+        """Step every enemy farther than 0.5 units toward the player.
+
+        Returns the enemies' distances to the player before the step.
+        """
+        x = self.column('x')
+        z = self.column('z')
+        dx = px - x
+        dz = pz - z
+        dist = np.hypot(dx, dz)
+        step = np.where(dist > 0.5, self.column('speed') / np.maximum(dist, 0.5), 0.0)
+        x += dx * step
+        z += dz * step
+        return dist
+
+    def pulse(self, rate=0.005, low=0.3, high=0.6):
+        """Grow or shrink every enemy, turning around past `low` and `high`."""
+        size = self.column('size')
+        growing = self.column('growing')
+        up = growing > 0
+        size += np.where(up, rate, -rate)
+        flip = np.where(up, size > high, size < low)
+        growing[flip] = 1.0 - growing[flip]
+
+    def separate(self, strength=0.5):
+        """Push overlapping enemies apart along the line between them.
+
+        Each pair moves `strength` of its overlap apart, split between the two.
+        """
+        if self.count < 2:
+            return
+        x = self.column('x')
+        z = self.column('z')
+        size = self.column('size')
+        a, b = SpatialHash(x, z).self_pairs(x, z)
+        dx = x[a] - x[b]
+        dz = z[a] - z[b]
+        dist = np.hypot(dx, dz)
+        overlap = size[a] + size[b] - dist
+        touching = (overlap > 0) & (dist > 1e-9)
+        a = a[touching]
+        b = b[touching]
+        push = strength * 0.5 * overlap[touching] / dist[touching]
+        px = np.bincount(a, dx[touching] * push, self.count) - np.bincount(b, dx[touching] * push, self.count)
+        pz = np.bincount(a, dz[touching] * push, self.count) - np.bincount(b, dz[touching] * push, self.count)
+        x += px
+        z += pz
+
+    def confine(self, half):
+        """Clamp every enemy into the square |x|, |z| <= half, so walls hold back a crowd pushed outward."""
+        np.clip(self.column('x'), -half, half, out=self.column('x'))
+        np.clip(self.column('z'), -half, half, out=self.column('z'))
+
+    def contacts(self, grid, px, pz):
+        """Indices of the enemies within ENEMY_CONTACT of (px, pz), looked up in `grid`, their SpatialHash."""
+        _, near = grid.pairs(np.array([px]), np.array([pz]))
+        near = np.sort(near)
+        dist = np.hypot(self.column('x')[near] - px, self.column('z')[near] - pz)
+        return near[dist < ENEMY_CONTACT]
+
+
+class BulletStore(EntityArrays):
+    """3D-Game bullets as [x, y, z, dx, dz, distance]."""
+
+    fields = ('x', 'y', 'z', 'dx', 'dz', 'distance')
+
+    def fire(self, x, y, z, dx, dz):
+        """Add a bullet by writing its fields straight into the next row; dropped if a fixed pool is full."""
+        index = self.acquire()
+        if index < 0:
+            return
+        data = self.data
+        data[0, index] = x
+        data[1, index] = y
+        data[2, index] = z
+        data[3, index] = dx
+        data[4, index] = dz
+        data[5, index] = 0.0
+
+    def advance(self, step=0.2):
+        """Move every bullet one tick along its velocity."""
+        x = self.column('x')
+        z = self.column('z')
+        distance = self.column('distance')
+        x += self.column('dx')
+        z += self.column('dz')
+        distance += step
+
+    def expired(self):
+        return self.column('distance') > BULLET_RANGE
+
+
+class SpatialHash(CellHash):
+    """3D-Game positions (x, z) bucketed into HASH_CELL square cells."""
+
+    def __init__(self, x, z, cell=HASH_CELL):
+        super().__init__(x, z, cell)
+
+    def self_pairs(self, x, z):
+        """Each pair (a, b) of the hashed points (x, z) in neighbouring cells once, with a != b."""
+        a, b = self.pairs(x, z, HALF_NEIGHBOURS)
+        # Points sharing a cell meet each other from both sides, and themselves
+        keep = (self.point_keys[a] != self.point_keys[b]) | (a < b)
+        return a[keep], b[keep]
+
+    def segment_pairs(self, x0, z0, dx, dz, reach):
+        """(segment index, point index) for every point that may lie within `reach` of a segment.
+
+        Segments run from (x0, z0) along (dx, dz). Long segments are sampled
+        at several query points, spaced so the 3x3 cells around them cover
+        the whole segment widened by `reach`; each pair is reported once.
+        """
+        spacing = 2 * (self.cell - reach)
+        if spacing <= 0:
+            raise ValueError(f"reach {reach} does not fit in cells of {self.cell}")
+        samples = np.maximum(np.ceil(np.hypot(dx, dz) / spacing), 1).astype(np.int64)
+        total = int(samples.sum())
+        seg = np.repeat(np.arange(len(x0)), samples)
+        # Sample k of n sits at the middle of the k-th of n equal pieces
+        k = np.arange(total) - np.repeat(np.cumsum(samples) - samples, samples)
+        t = (k + 0.5) / samples[seg]
+        q, p = self.pairs(x0[seg] + t * dx[seg], z0[seg] + t * dz[seg])
+        if total == len(x0):
+            return q, p
+        found = np.unique(seg[q] * len(self.order) + p)
+        return found // len(self.order), found % len(self.order)
+
+
+def find_hits(bullets, enemies, grid):
+    """Match bullets, in order, to the first not yet hit enemy each one touches.
+
+    Each bullet is swept along the segment it covered this tick, from
+    (x - dx, z - dz) to (x, z), so fast bullets can't skip over an enemy;
+    a bullet touching several takes the one it reaches first. `grid` is
+    the enemies' SpatialHash, which only has to be searched around each
+    segment. Returns (bullet indices, enemy indices) of the hits.
+    """
+    none = np.zeros(0, dtype=np.int64)
+    if not len(bullets) or not len(enemies):
+        return none, none
+    ex = enemies.column('x')
+    ez = enemies.column('z')
+    dx = bullets.column('dx')
+    dz = bullets.column('dz')
+    x0 = bullets.column('x') - dx
+    z0 = bullets.column('z') - dz
+    pair_b, pair_e = grid.segment_pairs(x0, z0, dx, dz, BULLET_REACH)
+    if not len(pair_b):
+        return none, none
+
+    # Narrow phase: closest point of each segment to the enemy's centre
+    rx = ex[pair_e] - x0[pair_b]
+    rz = ez[pair_e] - z0[pair_b]
+    sx = dx[pair_b]
+    sz = dz[pair_b]
+    length2 = np.maximum(sx * sx + sz * sz, 1e-12)
+    closest = np.clip((rx * sx + rz * sz) / length2, 0.0, 1.0)
+    miss2 = (rx - closest * sx) ** 2 + (rz - closest * sz) ** 2
+    reach = enemies.column('size')[pair_e] + BULLET_RADIUS
+    near = miss2 < reach * reach
+    pair_b = pair_b[near]
+    pair_e = pair_e[near]
+    if not len(pair_b):
+        return none, none
+    # Fraction of the tick at which the bullet first touches the enemy
+    entry = np.maximum(closest[near] - np.sqrt((reach[near] ** 2 - miss2[near]) / length2[near]), 0.0)
+    order = np.lexsort((pair_e, entry, pair_b))
+    return claim_in_order(pair_b[order], pair_e[order], len(bullets), len(enemies))
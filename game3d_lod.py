@@ -0,0 +1,35 @@
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+
+
+def select_levels(levels, dist, thresholds, hysteresis=0.15):
+    """New detail level per object: 0 is finest, one coarser for every threshold its distance passes.
+
+    A level only changes once the distance is `hysteresis` (a fraction of
+    the threshold) past the boundary, so objects hovering at a boundary
+    don't flicker between levels.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    coarsest = np.searchsorted(thresholds * (1 - hysteresis), dist)
+    finest = np.searchsorted(thresholds * (1 + hysteresis), dist)
+    return np.clip(levels, finest, coarsest)
+
+
+class SphereLists:
+    """Unit GLUT spheres compiled into one display list per tessellation, drawn scaled."""
+
+    def __init__(self):
+        self.lists = {}
+
+    def draw(self, radius, slices, stacks):
+        key = (slices, stacks)
+        if key not in self.lists:
+            self.lists[key] = glGenLists(1)
+            glNewList(self.lists[key], GL_COMPILE)
+            glutSolidSphere(1.0, slices, stacks)
+            glEndList()
+        glPushMatrix()
+        glScalef(radius, radius, radius)
+        glCallList(self.lists[key])
+        glPopMatrix()
@@ -0,0 +1,41 @@
+import math
+
+import numpy as np
+
+
+def heading(dx, dz):
+    """Heading in degrees [0, 360) of direction (dx, dz), as 3D-Game fires bullets: 0 is -z, 90 is -x."""
+    return np.degrees(np.arctan2(-dx, -dz)) % 360
+
+
+def nearest_in_cone(enemies, px, pz, aim, half_angle):
+    """Index of the enemy nearest (px, pz) strictly within half_angle degrees of heading `aim`, or -1.
+
+    One vectorised pass over the enemy columns; cheaper per tick than
+    keeping any index sorted by heading, with a single query to answer.
+    """
+    if not len(enemies):
+        return -1
+    dx = enemies.column('x') - px
+    dz = enemies.column('z') - pz
+    off = (heading(dx, dz) - aim + 180) % 360 - 180
+    dist = np.where(np.abs(off) < half_angle, np.hypot(dx, dz), np.inf)
+    best = int(np.argmin(dist))
+    return best if dist[best] < np.inf else -1
+
+
+def lead_point(ex, ez, vx, vz, ox, oz, bullet_speed):
+    """Point where a bullet fired now from (ox, oz) meets an enemy at (ex, ez) moving (vx, vz) per tick.
+
+    Falls back to the enemy's position when the bullet cannot catch it.
+    """
+    rx = ex - ox
+    rz = ez - oz
+    a = vx * vx + vz * vz - bullet_speed * bullet_speed
+    b = 2 * (rx * vx + rz * vz)
+    c = rx * rx + rz * rz
+    disc = b * b - 4 * a * c
+    if a >= 0 or disc < 0:
+        return ex, ez
+    t = (-b - math.sqrt(disc)) / (2 * a)
+    return ex + vx * t, ez + vz * t
@@ -0,0 +1,86 @@
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import *
+
+
+class GlyphFont:
+    """One display list per printable ASCII glyph of a GLUT bitmap font, built on first use."""
+
+    def __init__(self, font):
+        self.font = font
+        self.base = None
+
+    def list_base(self):
+        if self.base is None:
+            self.base = glGenLists(128)
+            for code in range(32, 127):
+                glNewList(self.base + code, GL_COMPILE)
+                glutBitmapCharacter(self.font, code)
+                glEndList()
+        return self.base
+
+
+class TextCache:
+    """Screen text queued with add() during a frame and drawn by draw() in one projection setup.
+
+    Each line is compiled into its own display list, keyed by position and
+    font, and only recompiled when its text or color changes; lines that were
+    not queued in a frame are dropped.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.fonts = {}
+        self.lines = {}  # (x, y, font) -> (text, color, display list)
+        self.queued = []
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+
+    def add(self, x, y, text, font=GLUT_BITMAP_HELVETICA_18, color=(1, 1, 1)):
+        self.queued.append((x, y, font, text, tuple(color)))
+
+    def compile_line(self, list_id, x, y, font, text, color):
+        # GLUT font handles are unhashable ctypes objects on some platforms
+        if id(font) not in self.fonts:
+            self.fonts[id(font)] = GlyphFont(font)
+        base = self.fonts[id(font)].list_base()
+        glNewList(list_id, GL_COMPILE)
+        glColor3f(*color)
+        glRasterPos2f(x, y)
+        glListBase(base)
+        glCallLists(text.encode('ascii', 'replace'))
+        glEndList()
+
+    def draw(self):
+        """Draw every queued line in window coordinates and clear the queue."""
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, self.width, 0, self.height)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        lines = {}
+        for x, y, font, text, color in self.queued:
+            key = (x, y, id(font))
+            cached = self.lines.pop(key, None)
+            if cached is None:
+                cached = (None, None, glGenLists(1))
+            list_id = cached[2]
+            if cached[:2] != (text, color):
+                self.compile_line(list_id, x, y, font, text, color)
+            if key in lines:  # Same spot twice in one frame; keep the later line
+                glDeleteLists(lines[key][2], 1)
+            lines[key] = (text, color, list_id)
+            glCallList(list_id)
+        for text, color, list_id in self.lines.values():
+            glDeleteLists(list_id, 1)
+        self.lines = lines
+        self.queued = []
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
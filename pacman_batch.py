@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+from pacman_entities import EntityArrays
+
+
+def sphere_mesh(radius, slices=10, stacks=10):
+    """Indexed triangle mesh of a UV sphere around the origin, like gluSphere's."""
+    theta = np.linspace(0, math.pi, stacks + 1)[:, None]  # From the +z pole down
+    phi = np.linspace(0, 2 * math.pi, slices + 1)[None, :]
+    vertices = np.stack(np.broadcast_arrays(radius * np.sin(theta) * np.cos(phi),
+                                            radius * np.sin(theta) * np.sin(phi),
+                                            radius * np.cos(theta)), axis=-1).reshape(-1, 3)
+    row = slices + 1
+    i = np.arange(stacks)[:, None] * row + np.arange(slices)[None, :]
+    quads = np.stack((i, i + row, i + row + 1, i, i + row + 1, i + 1), axis=-1)
+    return vertices.astype(np.float32), quads.reshape(-1).astype(np.uint32)
+
+
+def cube_mesh(size):
+    """Indexed triangle mesh of an axis-aligned cube around the origin, like glutSolidCube's."""
+    h = size / 2
+    vertices = np.array([[x, y, z] for x in (-h, h) for y in (-h, h) for z in (-h, h)], dtype=np.float32)
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    indices = [v for a, b, c, d in faces for v in (a, b, c, a, c, d)]
+    return vertices, np.array(indices, dtype=np.uint32)
+
+
+def entity_positions(entities):
+    """(n, 3) float32 positions of a list of [x, y, z, ...] rows or an EntityArrays store."""
+    if isinstance(entities, EntityArrays):
+        return entities.data[:3, :entities.count].T.astype(np.float32)
+    if not entities:
+        return np.zeros((0, 3), dtype=np.float32)
+    return np.asarray(entities, dtype=np.float32)[:, :3]
+
+
+class InstanceBatch:
+    """One mesh repeated at many positions, merged into a single indexed draw.
+
+    The index array only depends on the instance count, so it is built once
+    for a capacity that doubles as needed; per frame only the vertices are
+    recomputed, with one broadcast add.
+    """
+
+    def __init__(self, mesh):
+        self.vertices, self.indices = mesh
+        self.capacity = 0
+        self.all_indices = np.zeros(0, dtype=np.uint32)
+
+    def build(self, positions, scale=1.0):
+        """Vertices and indices for one instance of the mesh at each of `positions`."""
+        count = len(positions)
+        if count > self.capacity:
+            self.capacity = max(count, 2 * self.capacity, 16)
+            offsets = np.arange(self.capacity, dtype=np.uint32)[:, None] * len(self.vertices)
+            self.all_indices = (self.indices[None, :] + offsets).reshape(-1)
+        vertices = positions[:, None, :] + self.vertices[None, :, :] * np.float32(scale)
+        return vertices.reshape(-1, 3), self.all_indices[:count * len(self.indices)]
@@ -0,0 +1,267 @@
+import math
+
+import numpy as np
+
+
+class EntityArrays:
+    """Growable struct-of-arrays store: one contiguous float64 row per field.
+
+    Behaves enough like the plain list of lists it replaces (append, len,
+    iteration over [x, y, z, ...] rows) that drawing code works unchanged.
+    With fixed=True it is a preallocated pool that never grows: rows past
+    the capacity are refused instead.
+    """
+
+    fields = ('x', 'y', 'z')
+
+    def __init__(self, capacity=64, fixed=False):
+        self.data = np.zeros((len(self.fields), capacity))
+        self.count = 0
+        self.fixed = fixed
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.data[:, :self.count].T.tolist())
+
+    def column(self, name):
+        """Live view of one field over the active entities."""
+        return self.data[self.fields.index(name), :self.count]
+
+    def acquire(self):
+        """Claim the row after the live ones and return its index; -1 if a fixed pool is full."""
+        if self.count == self.data.shape[1]:
+            if self.fixed:
+                return -1
+            grown = np.zeros((len(self.fields), 2 * self.data.shape[1]))
+            grown[:, :self.count] = self.data[:, :self.count]
+            self.data = grown
+        self.count += 1
+        return self.count - 1
+
+    def append(self, row):
+        index = self.acquire()
+        if index >= 0:
+            self.data[:len(row), index] = row
+
+    def release(self, index):
+        """Swap-remove one entity: the last live row moves into its place."""
+        self.count -= 1
+        self.data[:, index] = self.data[:, self.count]
+
+    def compact(self, keep):
+        """Drop every entity whose entry in the boolean mask `keep` is False."""
+        kept = int(np.count_nonzero(keep))
+        self.data[:, :kept] = self.data[:, :self.count][:, keep]
+        self.count = kept
+
+    def remove(self, indices):
+        """Swap-remove the entities at `indices`: survivors from the end fill the holes, so order is not kept."""
+        indices = np.unique(indices)
+        if not len(indices):
+            return
+        new_count = self.count - len(indices)
+        holes = indices[indices < new_count]
+        movers = np.setdiff1d(np.arange(new_count, self.count), indices, assume_unique=True)
+        self.data[:, holes] = self.data[:, movers]
+        self.count = new_count
+
+    def clear(self):
+        self.count = 0
+
+    def load(self, values, count):
+        """Replace the contents with `count` entities given field by field as one flat sequence."""
+        if count > self.data.shape[1]:
+            self.data = np.zeros((len(self.fields), count))
+        self.data[:, :count] = np.asarray(values, dtype=np.float64).reshape(len(self.fields), count)
+        self.count = count
+
+
+class BulletArrays(EntityArrays):
+    """Bullets as [x, y, z, angle, travelled, impact] plus the cached sin/cos of their heading.
+
+    `impact` is the distance to the first wall (or the maze bounds), ray cast
+    once when the bullet is fired.
+    """
+
+    fields = ('x', 'y', 'z', 'angle', 'travelled', 'impact', 'sin', 'cos')
+
+    def append(self, row):
+        bx, by, bz, angle, travelled, impact = row
+        self.fire(bx, by, bz, angle, impact, travelled)
+
+    def fire(self, bx, by, bz, angle, impact, travelled=0.0):
+        """Add a bullet by writing its fields straight into the next row; dropped if a fixed pool is full."""
+        index = self.acquire()
+        if index < 0:
+            return
+        rad = math.radians(angle)
+        data = self.data
+        data[0, index] = bx
+        data[1, index] = by
+        data[2, index] = bz
+        data[3, index] = angle
+        data[4, index] = travelled
+        data[5, index] = impact
+        data[6, index] = math.sin(rad)
+        data[7, index] = math.cos(rad)
+
+    def advance(self, speed, dt):
+        """Move all bullets one tick and drop the ones that reached their impact distance.
+
+        Returns the number of bullets dropped.
+        """
+        x = self.column('x')
+        y = self.column('y')
+        travelled = self.column('travelled')
+        # Same operation order as the list path so positions match bit for bit
+        x += speed * self.column('sin') * dt * 60
+        y += speed * self.column('cos') * dt * 60
+        travelled += speed * dt * 60
+        keep = travelled < self.column('impact')
+        dropped = self.count - int(np.count_nonzero(keep))
+        if dropped:
+            self.compact(keep)
+        return dropped
+
+
+NEIGHBOURS = tuple((ox, oy) for ox in (-1, 0, 1) for oy in (-1, 0, 1))
+
+
+def _cell_keys(cx, cy):
+    """Pack integer-valued cell coordinates into one sortable int64 key."""
+    return (cx.astype(np.int64) + (1 << 30)) * (1 << 31) + (cy.astype(np.int64) + (1 << 30))
+
+
+class CellHash:
+    """Points bucketed into square cells, by sorting them on their cell key.
+
+    Built once per tick from the current positions; pairs() then finds the
+    points near many query points at once.
+    """
+
+    def __init__(self, x, y, cell):
+        self.cell = cell
+        self.point_keys = _cell_keys(np.floor(x / cell), np.floor(y / cell))
+        self.order = np.argsort(self.point_keys, kind='stable')
+        self.keys = self.point_keys[self.order]
+
+    def pairs(self, qx, qy, offsets=NEIGHBOURS):
+        """(query index, point index) for every point in the 3x3 cells around each query point."""
+        cx = np.floor(qx / self.cell)
+        cy = np.floor(qy / self.cell)
+        found_q = []
+        found_p = []
+        for ox, oy in offsets:
+            wanted = _cell_keys(cx + ox, cy + oy)
+            lo = np.searchsorted(self.keys, wanted, side='left')
+            hi = np.searchsorted(self.keys, wanted, side='right')
+            sizes = hi - lo
+            total = int(sizes.sum())
+            if not total:
+                continue
+            first = np.repeat(lo - np.cumsum(sizes) + sizes, sizes)
+            found_q.append(np.repeat(np.arange(len(qx)), sizes))
+            found_p.append(self.order[first + np.arange(total)])
+        if not found_q:
+            none = np.zeros(0, dtype=np.int64)
+            return none, none
+        return np.concatenate(found_q), np.concatenate(found_p)
+
+
+def claim_in_order(pair_a, pair_b, count_a, count_b):
+    """Let each a, in order, claim its first candidate b not already claimed by an earlier a.
+
+    Candidate pairs must be sorted by a, then by preference. A b wanted by a
+    single a goes to that a's first candidate directly; only a's competing
+    for some b are settled one by one. Returns the (a, b) index arrays of
+    the claims.
+    """
+    shared = np.bincount(pair_b, minlength=count_b) > 1
+    contested = np.zeros(count_a, dtype=bool)
+    contested[pair_a[shared[pair_b]]] = True
+    heads = np.flatnonzero(np.r_[True, pair_a[1:] != pair_a[:-1]])
+    easy = heads[~contested[pair_a[heads]]]
+    claim_a = pair_a[easy].tolist()
+    claim_b = pair_b[easy].tolist()
+    taken = set(claim_b)
+    done = set()
+    rest = contested[pair_a]
+    for a, b in zip(pair_a[rest].tolist(), pair_b[rest].tolist()):
+        if a not in done and b not in taken:
+            claim_a.append(a)
+            claim_b.append(b)
+            done.add(a)
+            taken.add(b)
+    return np.array(claim_a, dtype=np.int64), np.array(claim_b, dtype=np.int64)
+
+
+class EnemyArrays(EntityArrays):
+    """Enemies as [x, y, z]."""
+
+    def pursue(self, px, py, speed, dt, walls, flow=None, radius=15):
+        """Step every enemy farther than 5 units toward (px, py) unless a wall blocks it.
+
+        With a FlowField, enemies follow it instead of a straight line.
+        """
+        x = self.column('x')
+        y = self.column('y')
+        if flow is not None:
+            tx, ty = flow.targets(x, y, px, py)
+        else:
+            tx, ty = px, py
+        dx = tx - x
+        dy = ty - y
+        dist = np.hypot(dx, dy)
+        moving = np.flatnonzero(dist > 5)
+        if not len(moving):
+            return
+        new_x = x[moving] + speed * (dx[moving] / dist[moving]) * dt * 60
+        new_y = y[moving] + speed * (dy[moving] / dist[moving]) * dt * 60
+        ok = walls.free_mask(new_x, new_y, radius)
+        x[moving[ok]] = new_x[ok]
+        y[moving[ok]] = new_y[ok]
+
+    def claim_bullets(self, bullets, consumed, start=0, reach=20):
+        """Match enemies from `start` on, in order, to the first unconsumed bullet within reach.
+
+        Bullets are hashed into reach-sized cells, so each enemy only looks
+        at the 3x3 cells around it. Returns the claimed bullet index per
+        enemy (-1 for none) and marks claimed bullets in `consumed`.
+        """
+        count = self.count - start
+        claimed = np.full(count, -1, dtype=np.int64)
+        live = np.flatnonzero(~consumed)
+        if not count or not len(live):
+            return claimed
+        ex = self.column('x')[start:]
+        ey = self.column('y')[start:]
+        ez = self.column('z')[start:]
+        bx = bullets.column('x')
+        by = bullets.column('y')
+        bz = bullets.column('z')
+
+        # Broad phase: enemies look up the live bullets hashed into reach-sized cells
+        pair_e, pair_b = CellHash(bx[live], by[live], reach).pairs(ex, ey)
+        pair_b = live[pair_b]
+
+        # Narrow phase
+        near = (np.hypot(bx[pair_b] - ex[pair_e], by[pair_b] - ey[pair_e]) < reach) & \
+               (np.abs(bz[pair_b] - ez[pair_e]) < reach)
+        pair_e = pair_e[near]
+        pair_b = pair_b[near]
+        if not len(pair_e):
+            return claimed
+        order = np.lexsort((pair_b, pair_e))
+        claim_e, claim_b = claim_in_order(pair_e[order], pair_b[order], count, len(consumed))
+        claimed[claim_e] = claim_b
+        consumed[claim_b] = True
+        return claimed
+
+    def contact_mask(self, px, py, pz, start=0, reach=35):
+        """True for each enemy from `start` on that touches the player."""
+        ex = self.column('x')[start:]
+        ey = self.column('y')[start:]
+        ez = self.column('z')[start:]
+        return (np.hypot(ex - px, ey - py) < reach) & (np.abs(ez - pz) < 20)
@@ -0,0 +1,913 @@
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+MAZE_FILE_VERSION = 1
+
+# Wall segments are stored as [x1, y1, x2, y2, height]; only axis-aligned
+# walls take part in collision, matching the original is_valid_position.
+VERTICAL = 0
+HORIZONTAL = 1
+
+
+class WallGrid:
+    """Uniform bucket grid over maze walls for point-radius collision queries."""
+
+    def __init__(self, walls, cell_size=40):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.segments = []
+        self.rect_tables = {}
+        self.build(walls)
+
+    def build(self, walls):
+        """(Re)bucket every axis-aligned wall by the cells its extent covers."""
+        self.cells = {}
+        self.segments = []
+        self.rect_tables = {}
+        cs = self.cell_size
+        for wall in walls:
+            x1, y1, x2, y2 = wall[0], wall[1], wall[2], wall[3]
+            if x1 == x2:  # Vertical wall
+                entry = (VERTICAL, x1, min(y1, y2), max(y1, y2))
+            elif y1 == y2:  # Horizontal wall
+                entry = (HORIZONTAL, y1, min(x1, x2), max(x1, x2))
+            else:
+                continue
+            self.segments.append(entry)
+            for cx in range(math.floor(min(x1, x2) / cs), math.floor(max(x1, x2) / cs) + 1):
+                for cy in range(math.floor(min(y1, y2) / cs), math.floor(max(y1, y2) / cs) + 1):
+                    self.cells.setdefault((cx, cy), []).append(entry)
+
+    def to_arrays(self):
+        """Flatten the buckets into (keys, offsets, members, segments) arrays for saving."""
+        segments = sorted(set(self.segments))
+        number = {entry: i for i, entry in enumerate(segments)}
+        keys = sorted(self.cells)
+        sizes = [len(self.cells[key]) for key in keys]
+        offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        members = np.array([number[entry] for key in keys for entry in self.cells[key]], dtype=np.int64)
+        return (np.array(keys, dtype=np.int64).reshape(-1, 2), offsets, members,
+                np.array(segments, dtype=float).reshape(-1, 4))
+
+    def load_arrays(self, keys, offsets, members, segments):
+        """Restore buckets saved by to_arrays without re-walking the walls."""
+        self.segments = [(int(kind), c, lo, hi) for kind, c, lo, hi in segments.tolist()]
+        rows = [self.segments[m] for m in members.tolist()]
+        bounds = offsets.tolist()
+        self.cells = {(cx, cy): rows[bounds[i]:bounds[i + 1]] for i, (cx, cy) in enumerate(keys.tolist())}
+        self.rect_tables = {}
+
+    def is_free(self, x, y, radius):
+        """Return True if a circle of `radius` at (x, y) touches no wall."""
+        cs = self.cell_size
+        cells = self.cells
+        for cx in range(math.floor((x - radius) / cs), math.floor((x + radius) / cs) + 1):
+            for cy in range(math.floor((y - radius) / cs), math.floor((y + radius) / cs) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    continue
+                for kind, c, lo, hi in bucket:
+                    if kind == VERTICAL:
+                        if abs(x - c) < radius and lo - radius < y < hi + radius:
+                            return False
+                    elif abs(y - c) < radius and lo - radius < x < hi + radius:
+                        return False
+        return True
+
+    def inflated_rects(self, radius):
+        """Open (x0, y0, x1, y1) boxes a circle centre must avoid, one per distinct wall."""
+        rects = set()
+        for kind, c, lo, hi in self.segments:
+            if kind == VERTICAL:
+                rects.add((c - radius, lo - radius, c + radius, hi + radius))
+            else:
+                rects.add((lo - radius, c - radius, hi + radius, c + radius))
+        return sorted(rects)
+
+    def rect_table(self, radius):
+        """Per-radius table of open wall rectangles padded per grid cell.
+
+        Every wall is inflated by `radius` into the open box a circle centre
+        must avoid, then bucketed so each cell row lists all boxes touching it.
+        """
+        table = self.rect_tables.get(radius)
+        if table is not None:
+            return table
+        cs = self.cell_size
+        rects = self.inflated_rects(radius)
+        if not rects:
+            table = (0, 0, 1, 1, np.full((1, 1, 4), np.nan))
+            self.rect_tables[radius] = table
+            return table
+        r = np.array(rects, dtype=float)
+        ox = math.floor(r[:, 0].min() / cs)
+        oy = math.floor(r[:, 1].min() / cs)
+        nx = math.floor(r[:, 2].max() / cs) - ox + 1
+        ny = math.floor(r[:, 3].max() / cs) - oy + 1
+        buckets = [[] for _ in range(nx * ny)]
+        for rect in rects:
+            for cx in range(math.floor(rect[0] / cs) - ox, math.floor(rect[2] / cs) - ox + 1):
+                for cy in range(math.floor(rect[1] / cs) - oy, math.floor(rect[3] / cs) - oy + 1):
+                    buckets[cx * ny + cy].append(rect)
+        width = max(len(b) for b in buckets)
+        # NaN padding never satisfies the strict comparisons in free_mask
+        padded = np.full((nx * ny, width, 4), np.nan)
+        for i, bucket in enumerate(buckets):
+            if bucket:
+                padded[i, :len(bucket)] = bucket
+        table = (ox, oy, nx, ny, padded)
+        self.rect_tables[radius] = table
+        return table
+
+    def free_mask(self, xs, ys, radius):
+        """Vectorized is_free: boolean array, True where (xs, ys) is clear."""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        ox, oy, nx, ny, padded = self.rect_table(radius)
+        cx = np.floor(xs / self.cell_size).astype(np.int64) - ox
+        cy = np.floor(ys / self.cell_size).astype(np.int64) - oy
+        inside = (cx >= 0) & (cx < nx) & (cy >= 0) & (cy < ny)
+        free = np.ones(xs.shape, dtype=bool)
+        if not inside.any():
+            return free
+        rows = padded[cx[inside] * ny + cy[inside]]
+        px = xs[inside][:, None]
+        py = ys[inside][:, None]
+        blocked = (rows[:, :, 0] < px) & (px < rows[:, :, 2]) & (rows[:, :, 1] < py) & (py < rows[:, :, 3])
+        free[inside] = ~blocked.any(axis=1)
+        return free
+
+    def ray_cast(self, x, y, dx, dy, radius, max_dist):
+        """Distance along the unit ray (dx, dy) from (x, y) until a circle of
+        `radius` starts to touch a wall, or max_dist if it never does first.
+
+        Walks the per-radius cell table in ray order (grid DDA) and stops as
+        soon as the best hit lies before the next cell the ray enters.
+        """
+        ox, oy, nx, ny, padded = self.rect_table(radius)
+        cs = self.cell_size
+        # Clip the ray to the table's grid so the walk starts inside it
+        t0, t1 = _slab(x, y, dx, dy, ox * cs, oy * cs, (ox + nx) * cs, (oy + ny) * cs)
+        t0 = max(t0, 0.0)
+        t1 = min(t1, max_dist)
+        if t0 > t1:
+            return max_dist
+        sx = x + dx * t0
+        sy = y + dy * t0
+        cx = min(max(math.floor(sx / cs) - ox, 0), nx - 1)
+        cy = min(max(math.floor(sy / cs) - oy, 0), ny - 1)
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        next_x = ((cx + ox + (step_x > 0)) * cs - x) / dx if dx else math.inf
+        next_y = ((cy + oy + (step_y > 0)) * cs - y) / dy if dy else math.inf
+        delta_x = cs / abs(dx) if dx else math.inf
+        delta_y = cs / abs(dy) if dy else math.inf
+        best = max_dist
+        while 0 <= cx < nx and 0 <= cy < ny:
+            for r0, q0, r1, q1 in padded[cx * ny + cy].tolist():
+                if r0 != r0:  # NaN padding
+                    break
+                enter, leave = _slab(x, y, dx, dy, r0, q0, r1, q1)
+                if enter < leave and leave > 0 and enter < best:
+                    best = max(enter, 0.0)
+            cell_exit = min(next_x, next_y)
+            if best <= cell_exit or cell_exit >= t1:
+                break
+            if next_x < next_y:
+                next_x += delta_x
+                cx += step_x
+            else:
+                next_y += delta_y
+                cy += step_y
+        return best
+
+
+def _slab(x, y, dx, dy, x0, y0, x1, y1):
+    """Parameter interval (enter, leave) of the ray (x, y) + t * (dx, dy) inside a box."""
+    enter = -math.inf
+    leave = math.inf
+    for o, d, lo, hi in ((x, dx, x0, x1), (y, dy, y0, y1)):
+        if d:
+            a = (lo - o) / d
+            b = (hi - o) / d
+            if a > b:
+                a, b = b, a
+            enter = max(enter, a)
+            leave = min(leave, b)
+        elif not lo < o < hi:
+            return math.inf, -math.inf
+    return enter, leave
+
+
+def box_exit_distance(x, y, dx, dy, box):
+    """Distance along the unit ray (dx, dy) from (x, y) inside `box` to its boundary."""
+    enter, leave = _slab(x, y, dx, dy, *box)
+    return max(leave, 0.0) if enter <= 0 <= leave else 0.0
+
+
+class NavGrid:
+    """Walkable-cell grid over the maze and the links between neighbouring cells.
+
+    The grid only depends on the walls, so one NavGrid is shared read-only
+    by every game on the maze; each game steers its enemies with its own
+    FlowField over it.
+    """
+
+    def __init__(self, wall_index, walls, cell_size=20, radius=15, free=None, links=None):
+        self.wall_index = wall_index
+        self.cell_size = cell_size
+        self.radius = radius
+        self.build(walls, free, links)
+
+    def build(self, walls, free=None, links=None):
+        """Rasterize free cells from the walls; call again when the maze changes.
+
+        Flow fields built over the old grid must be made again afterwards.
+
+        `free` and `links` may be the walkable-cell mask and the
+        (link_offsets, links) arrays saved from an earlier build.
+        """
+        cs = self.cell_size
+        xs = [c for wall in walls for c in (wall[0], wall[2])] or [0]
+        ys = [c for wall in walls for c in (wall[1], wall[3])] or [0]
+        self.x0 = min(xs)
+        self.y0 = min(ys)
+        self.nx = max(1, math.ceil((max(xs) - self.x0) / cs))
+        self.ny = max(1, math.ceil((max(ys) - self.y0) / cs))
+        ix, iy = np.meshgrid(np.arange(self.nx), np.arange(self.ny), indexing='ij')
+        self.center_x = (self.x0 + (ix.ravel() + 0.5) * cs).astype(float)
+        self.center_y = (self.y0 + (iy.ravel() + 0.5) * cs).astype(float)
+        self.center_list_x = self.center_x.tolist()
+        self.center_list_y = self.center_y.tolist()
+        if free is None:
+            free = self.wall_index.free_mask(self.center_x, self.center_y, self.radius)
+        self.free = free
+        if links is None:
+            links = self.link_arrays()
+        # Compressed rows: the neighbours of cell c are links[link_offsets[c]:link_offsets[c + 1]]
+        self.link_offsets, self.links = links
+        self.offset_list = self.link_offsets.tolist()
+        self.link_list = self.links.tolist()
+        self.free_list = self.free.tolist()
+
+    def link_arrays(self):
+        """4-connected neighbours of every cell as compressed rows (link_offsets, links).
+
+        Free cells link to free neighbours for the BFS; blocked cells keep
+        their free neighbours so agents that ended up against a wall can be
+        led back into the corridor. No link crosses a wall: cells as wide as
+        a corridor have free centres on both sides. Each row lists -x, +x,
+        -y, +y neighbours in that order.
+        """
+        nx, ny = self.nx, self.ny
+        grid = self.free.reshape(nx, ny)
+        index = np.arange(nx * ny).reshape(nx, ny)
+        walled_x, walled_y = self.walled_links()
+        around = np.full((nx, ny, 4), -1, dtype=np.int64)
+        around[1:, :, 0] = np.where(grid[:-1] & ~walled_x, index[:-1], -1)
+        around[:-1, :, 1] = np.where(grid[1:] & ~walled_x, index[1:], -1)
+        around[:, 1:, 2] = np.where(grid[:, :-1] & ~walled_y, index[:, :-1], -1)
+        around[:, :-1, 3] = np.where(grid[:, 1:] & ~walled_y, index[:, 1:], -1)
+        around = around.reshape(-1, 4)
+        linked = around >= 0
+        offsets = np.concatenate(([0], np.cumsum(linked.sum(axis=1)))).astype(np.int64)
+        return offsets, around[linked]
+
+    def linked(self, c):
+        """Neighbours cell c links to."""
+        return self.link_list[self.offset_list[c]:self.offset_list[c + 1]]
+
+    def walled_links(self):
+        """(walled_x, walled_y): True where a wall touches the segment between two neighbouring centres.
+
+        walled_x[i, j] covers the link from cell (i, j) to (i + 1, j) and
+        walled_y[i, j] the link from (i, j) to (i, j + 1).
+        """
+        cs = self.cell_size
+        walled_x = np.zeros((max(self.nx - 1, 0), self.ny), dtype=bool)
+        walled_y = np.zeros((self.nx, max(self.ny - 1, 0)), dtype=bool)
+        for kind, c, lo, hi in self.wall_index.segments:
+            if kind == VERTICAL:
+                x_lo, x_hi, y_lo, y_hi = c, c, lo, hi
+            else:
+                x_lo, x_hi, y_lo, y_hi = lo, hi, c, c
+            # Links along x span [centre i, centre i + 1] and sit on the centre row j
+            _mark_links(walled_x, (x_lo - self.x0) / cs, (x_hi - self.x0) / cs,
+                        (y_lo - self.y0) / cs, (y_hi - self.y0) / cs)
+            _mark_links(walled_y.T, (y_lo - self.y0) / cs, (y_hi - self.y0) / cs,
+                        (x_lo - self.x0) / cs, (x_hi - self.x0) / cs)
+        return walled_x, walled_y
+
+    def cell_of(self, x, y):
+        """Flat cell index containing (x, y), or -1 outside the grid."""
+        cx = math.floor((x - self.x0) / self.cell_size)
+        cy = math.floor((y - self.y0) / self.cell_size)
+        if 0 <= cx < self.nx and 0 <= cy < self.ny:
+            return cx * self.ny + cy
+        return -1
+
+    def cells_of(self, xs, ys):
+        """Vectorized cell_of."""
+        cx = np.floor((xs - self.x0) / self.cell_size).astype(np.int64)
+        cy = np.floor((ys - self.y0) / self.cell_size).astype(np.int64)
+        inside = (cx >= 0) & (cx < self.nx) & (cy >= 0) & (cy < self.ny)
+        return np.where(inside, cx * self.ny + cy, -1)
+
+    def exits_of(self, reached):
+        """(exits, next): blocked cells linked to a reached cell, each with the
+        first reached cell in its row, which leads a stuck agent back out.
+        """
+        size = self.nx * self.ny
+        near = np.concatenate((reached - self.ny, reached + self.ny, reached - 1, reached + 1))
+        near = np.unique(near[(near >= 0) & (near < size)])
+        blocked = near[~self.free[near]]
+        on = np.zeros(size, dtype=bool)
+        on[reached] = True
+        start = self.link_offsets[blocked]
+        count = self.link_offsets[blocked + 1] - start
+        # Rows hold at most four links; pad the shorter ones with a dead slot
+        slot = start[:, None] + np.arange(4)
+        valid = np.arange(4) < count[:, None]
+        row = np.where(valid, self.links[np.where(valid, slot, 0)], 0)
+        hit = valid & on[row]
+        found = hit.any(axis=1)
+        first = hit.argmax(axis=1)
+        return blocked[found], row[found, first[found]]
+
+
+class FlowField:
+    """BFS flow field over a NavGrid toward one goal cell, usually the player.
+
+    The field stores, for every cell within `reach` of the goal, the centre
+    of the next cell on a shortest 4-connected path to it, so any number of
+    agents can be steered with one array lookup each. It is per-game state:
+    games sharing a maze share its NavGrid but each keeps its own field.
+    """
+
+    def __init__(self, nav, reach=2048):
+        self.nav = nav
+        self.reach = reach
+        self.goal = -1
+        self.routed = np.zeros(0, dtype=np.int64)
+        self.next_list = [-1] * (nav.nx * nav.ny)
+        self.next_x = np.full(nav.nx * nav.ny, np.nan)
+        self.next_y = np.full(nav.nx * nav.ny, np.nan)
+
+    def update(self, gx, gy):
+        """Recompute the flow field if the goal moved to another cell.
+
+        The BFS stops once about `reach` cells nearest the goal are routed,
+        so its cost does not grow with the maze; agents further out are left
+        unrouted and head straight for the goal until they come within range.
+        """
+        nav = self.nav
+        goal = nav.cell_of(gx, gy)
+        if goal == self.goal:
+            return
+        self.goal = goal
+        step = self.next_list
+        # Only the cells routed last time need clearing
+        for c in self.routed.tolist():
+            step[c] = -1
+        self.next_x[self.routed] = np.nan
+        self.next_y[self.routed] = np.nan
+        routed = nxt = np.zeros(0, dtype=np.int64)
+        if goal >= 0:
+            offsets = nav.offset_list
+            links = nav.link_list
+            free = nav.free_list
+            step[goal] = goal
+            frontier = [goal] if free[goal] else []
+            reached = frontier[:]
+            while frontier and len(reached) < self.reach:
+                following = []
+                for c in frontier:
+                    for n in links[offsets[c]:offsets[c + 1]]:
+                        if step[n] < 0:
+                            step[n] = c
+                            following.append(n)
+                reached.extend(following)
+                frontier = following
+            step[goal] = -1
+            if reached:
+                exits, leads = nav.exits_of(np.array(reached, dtype=np.int64))
+                for b, n in zip(exits.tolist(), leads.tolist()):
+                    step[b] = n
+                routed = np.concatenate((reached[1:], exits)).astype(np.int64)
+                nxt = np.concatenate(([step[c] for c in reached[1:]], leads)).astype(np.int64)
+        self.routed = routed
+        self.next_x[routed] = nav.center_x[nxt]
+        self.next_y[routed] = nav.center_y[nxt]
+
+    def target(self, x, y, gx, gy):
+        """Point an agent at (x, y) should head for to reach the goal (gx, gy)."""
+        c = self.nav.cell_of(x, y)
+        if c < 0:
+            return gx, gy
+        n = self.next_list[c]
+        if n < 0:  # Goal cell itself, or no path
+            return gx, gy
+        return self.nav.center_list_x[n], self.nav.center_list_y[n]
+
+    def targets(self, xs, ys, gx, gy):
+        """Vectorized target for many agents: one gather from the flow field."""
+        c = self.nav.cells_of(xs, ys)
+        tx = np.where(c >= 0, self.next_x[c], np.nan)
+        ty = np.where(c >= 0, self.next_y[c], np.nan)
+        unrouted = np.isnan(tx)
+        tx[unrouted] = gx
+        ty[unrouted] = gy
+        return tx, ty
+
+
+def _mark_links(links, along_lo, along_hi, across_lo, across_hi):
+    """Set links[i, j] where a wall spanning [along_lo, along_hi] x [across_lo, across_hi],
+    in cell units from the grid origin, touches the link from centre i to centre i + 1 on row j.
+    """
+    i0 = max(math.ceil(along_lo - 1.5), 0)
+    i1 = min(math.floor(along_hi - 0.5), links.shape[0] - 1)
+    j0 = max(math.ceil(across_lo - 0.5), 0)
+    j1 = min(math.floor(across_hi - 0.5), links.shape[1] - 1)
+    if i0 <= i1 and j0 <= j1:
+        links[i0:i1 + 1, j0:j1 + 1] = True
+
+
+def wall_footprints(walls, thickness=20):
+    """Axis-aligned (x0, y0, x1, y1, height) boxes covered by each wall."""
+    half = thickness / 2
+    boxes = []
+    for wall in walls:
+        x1, y1, x2, y2, height = wall[:5]
+        if x1 == x2:  # Vertical wall
+            boxes.append((x1 - half, min(y1, y2), x1 + half, max(y1, y2), height))
+        elif y1 == y2:  # Horizontal wall
+            boxes.append((min(x1, x2), y1 - half, max(x1, x2), y1 + half, height))
+    return boxes
+
+
+def _runs(values):
+    """Split a 1D array into (start, stop, value) runs of equal entries."""
+    n = len(values)
+    if not n:
+        return []
+    cuts = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate(([0], cuts))
+    stops = np.concatenate((cuts, [n]))
+    return zip(starts.tolist(), stops.tolist(), values[starts].tolist())
+
+
+def _record_runs(*columns):
+    """_runs over several equally long columns compared together as one record."""
+    stacked = np.ascontiguousarray(np.stack(columns, axis=1), dtype=float)
+    return _runs(stacked.view([(f'f{i}', float) for i in range(len(columns))]).ravel())
+
+
+def build_wall_mesh(walls, thickness=20):
+    """Merge all wall boxes into one quad mesh without overlap or hidden faces.
+
+    The footprints are rasterized on a grid compressed to their own edge
+    coordinates, each cell taking the tallest wall covering it. Tops are
+    emitted as runs of equal height and sides only where the height changes,
+    so crossings and corners produce no doubled geometry. Every quad is
+    owned by exactly one footprint (see wall_footprints) and quads are
+    grouped by owner, so one wall's geometry is one contiguous range.
+
+    Returns (vertices, owners): float32 vertices of shape (4 * quads, 3)
+    ready for GL_QUADS and the owning footprint index of each quad.
+    """
+    boxes = wall_footprints(walls, thickness)
+    if not boxes:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    b = np.array(boxes, dtype=float)
+    xs = np.unique(np.concatenate((b[:, 0], b[:, 2])))
+    ys = np.unique(np.concatenate((b[:, 1], b[:, 3])))
+    i0 = np.searchsorted(xs, b[:, 0])
+    i1 = np.searchsorted(xs, b[:, 2])
+    j0 = np.searchsorted(ys, b[:, 1])
+    j1 = np.searchsorted(ys, b[:, 3])
+    heights = np.zeros((len(xs) - 1, len(ys) - 1))
+    owner = np.full(heights.shape, -1.0)
+    for k, (a0, a1, c0, c1, h) in enumerate(zip(i0.tolist(), i1.tolist(), j0.tolist(), j1.tolist(), b[:, 4].tolist())):
+        cells = heights[a0:a1, c0:c1]
+        taller = cells < h
+        owner[a0:a1, c0:c1][taller] = k
+        cells[taller] = h
+
+    quads = []
+    owners = []
+    # Tops: runs of equal height and owner along x in every y strip
+    for j in range(heights.shape[1]):
+        for s, e, (h, k) in _record_runs(heights[:, j], owner[:, j]):
+            if h > 0:
+                quads.append(((xs[s], ys[j], h), (xs[e], ys[j], h), (xs[e], ys[j + 1], h), (xs[s], ys[j + 1], h)))
+                owners.append(k)
+    # Sides facing x: wherever the height steps between neighbouring columns,
+    # owned by the wall on the taller side
+    padded = np.pad(heights, ((1, 1), (0, 0)))
+    padded_owner = np.pad(owner, ((1, 1), (0, 0)), constant_values=-1)
+    for i in range(padded.shape[0] - 1):
+        lo = np.minimum(padded[i], padded[i + 1])
+        hi = np.maximum(padded[i], padded[i + 1])
+        side_owner = np.where(padded[i] >= padded[i + 1], padded_owner[i], padded_owner[i + 1])
+        for s, e, (z0, z1, k) in _record_runs(lo, hi, side_owner):
+            if z1 > z0:
+                quads.append(((xs[i], ys[s], z0), (xs[i], ys[e], z0), (xs[i], ys[e], z1), (xs[i], ys[s], z1)))
+                owners.append(k)
+    # Sides facing y
+    padded = np.pad(heights, ((0, 0), (1, 1)))
+    padded_owner = np.pad(owner, ((0, 0), (1, 1)), constant_values=-1)
+    for j in range(padded.shape[1] - 1):
+        lo = np.minimum(padded[:, j], padded[:, j + 1])
+        hi = np.maximum(padded[:, j], padded[:, j + 1])
+        side_owner = np.where(padded[:, j] >= padded[:, j + 1], padded_owner[:, j], padded_owner[:, j + 1])
+        for s, e, (z0, z1, k) in _record_runs(lo, hi, side_owner):
+            if z1 > z0:
+                quads.append(((xs[s], ys[j], z0), (xs[e], ys[j], z0), (xs[e], ys[j], z1), (xs[s], ys[j], z1)))
+                owners.append(k)
+    owners = np.array(owners, dtype=np.int64)
+    order = np.argsort(owners, kind='stable')
+    vertices = np.array(quads, dtype=np.float32)[order].reshape(-1, 3)
+    return vertices, owners[order]
+
+
+class WallCuller:
+    """Per-wall frustum and occlusion culling over the ranges of a build_wall_mesh mesh.
+
+    Walls are the footprints of wall_footprints. The occlusion pass works on
+    the 2D layout: seen from an eye below the wall tops, a full-height wall
+    hides everything behind it across the bearings it spans, so a 1D buffer
+    of bearing bins holding the nearest such wall is enough.
+    """
+
+    def __init__(self, walls, owners, thickness=20, bins=256):
+        self.boxes = np.array(wall_footprints(walls, thickness), dtype=float).reshape(-1, 5)
+        counts = np.bincount(owners, minlength=len(self.boxes))
+        # Vertex ranges of each wall in the mesh, as glMultiDrawArrays wants them
+        self.first = ((np.cumsum(counts) - counts) * 4).astype(np.int32)
+        self.count = (counts * 4).astype(np.int32)
+        self.walls = np.flatnonzero(counts)  # Walls that own any geometry at all
+        self.occluder_height = self.boxes[:, 4].max() if len(self.boxes) else 0
+        self.bins = bins
+        self.submitted = 0
+        self.culled = 0
+
+    def frustum_mask(self, clip, walls):
+        """True for each of `walls` whose box touches the frustum of the 4x4 clip matrix.
+
+        `clip` maps world points to clip coordinates (projection @ modelview);
+        planes are taken straight from its rows.
+        """
+        planes = np.array([clip[3] + clip[0], clip[3] - clip[0], clip[3] + clip[1],
+                           clip[3] - clip[1], clip[3] + clip[2], clip[3] - clip[2]])
+        b = self.boxes[walls]
+        lo = np.stack((b[:, 0], b[:, 1], np.zeros(len(b))), axis=1)
+        hi = np.stack((b[:, 2], b[:, 3], b[:, 4]), axis=1)
+        # Corner of each box farthest along each plane normal
+        far = np.where(planes[:, None, :3] > 0, hi[None], lo[None])
+        return ((far * planes[:, None, :3]).sum(axis=2) + planes[:, 3:4] >= 0).all(axis=0)
+
+    def occlusion_mask(self, walls, eye, forward, half_fov):
+        """True for each of `walls` not hidden behind nearer full-height walls.
+
+        `eye` is (x, y, z), `forward` the horizontal view direction and
+        `half_fov` the horizontal half angle of the view in radians.
+        """
+        visible = np.ones(len(walls), dtype=bool)
+        ex, ey, ez = eye
+        if not len(walls) or not 0 <= ez <= self.occluder_height:
+            return visible
+        b = self.boxes[walls]
+        heading = math.atan2(forward[1], forward[0])
+        cx = np.stack((b[:, 0], b[:, 2], b[:, 2], b[:, 0]), axis=1) - ex
+        cy = np.stack((b[:, 1], b[:, 1], b[:, 3], b[:, 3]), axis=1) - ey
+        bearing = (np.arctan2(cy, cx) - heading + math.pi) % (2 * math.pi) - math.pi
+        lo = bearing.min(axis=1)
+        hi = bearing.max(axis=1)
+        near = np.hypot(np.clip(ex, b[:, 0], b[:, 2]) - ex, np.clip(ey, b[:, 1], b[:, 3]) - ey)
+        far = np.hypot(cx, cy).max(axis=1)
+        # Boxes around the eye or across the direction behind it have no
+        # usable bearing interval; they stay visible and occlude nothing
+        usable = (near > 0) & (hi - lo < math.pi)
+        scale = self.bins / (2 * half_fov)
+        first_bin = np.clip(np.floor((lo + half_fov) * scale), 0, self.bins - 1).astype(int)
+        last_bin = np.clip(np.floor((hi + half_fov) * scale), 0, self.bins - 1).astype(int)
+        # Bins an occluder covers completely
+        full_first = np.ceil((lo + half_fov) * scale).astype(int)
+        full_stop = np.floor((hi + half_fov) * scale).astype(int)
+        occluder = usable & (b[:, 4] >= self.occluder_height)
+
+        depth = np.full(self.bins, np.inf)
+        horizon = np.inf  # Farthest occluder depth over all bins
+        order = np.argsort(near, kind='stable')
+        for i in order.tolist():
+            if not usable[i]:
+                continue
+            if near[i] >= horizon or depth[first_bin[i]:last_bin[i] + 1].max() <= near[i]:
+                visible[i] = False
+                continue
+            if occluder[i]:
+                s = max(full_first[i], 0)
+                e = min(full_stop[i], self.bins)
+                if s < e:
+                    np.minimum(depth[s:e], far[i], out=depth[s:e])
+                    horizon = depth.max()
+        return visible
+
+    def visible(self, clip, eye=None, forward=None, half_fov=None):
+        """Indices of the walls to draw; occlusion is applied when `eye` is given.
+
+        Updates the submitted/culled counters for this frame.
+        """
+        walls = self.walls[self.frustum_mask(clip, self.walls)]
+        if eye is not None:
+            walls = walls[self.occlusion_mask(walls, eye, forward, half_fov)]
+        self.submitted = len(walls)
+        self.culled = len(self.walls) - len(walls)
+        return walls
+
+
+class SpawnSampler:
+    """Table of grid cells lying entirely in free space for one entity radius.
+
+    Any point inside a listed cell is a valid position, so a spawn is one
+    random cell pick plus a random offset, with no rejection loop. Keeping a
+    distance from the player skips the few cells near the player's 20-unit
+    cell, found from a window of the sorted table and cached per player cell.
+    """
+
+    def __init__(self, wall_index, radius, bounds, cell_size=5, free_cells=None):
+        self.radius = radius
+        self.cell_size = cell_size
+        x0, y0, x1, y1 = bounds
+        self.x0 = x0
+        self.y0 = y0
+        self.nx = max(1, int((x1 - x0) // cell_size))
+        self.ny = max(1, int((y1 - y0) // cell_size))
+        if free_cells is None:
+            blocked = np.zeros((self.nx, self.ny), dtype=bool)
+            for r0, q0, r1, q1 in wall_index.inflated_rects(radius):
+                # Closed cell [a, a + cs] overlaps the open box iff a < r1 and a + cs > r0
+                i0 = max(0, math.floor((r0 - x0) / cell_size))
+                i1 = min(self.nx, math.ceil((r1 - x0) / cell_size))
+                j0 = max(0, math.floor((q0 - y0) / cell_size))
+                j1 = min(self.ny, math.ceil((q1 - y0) / cell_size))
+                if i0 < i1 and j0 < j1:
+                    blocked[i0:i1, j0:j1] = True
+            free_cells = np.flatnonzero(~blocked.ravel())
+        self.free_cells = free_cells  # Sorted flat indices cx * ny + cy
+        self.away_key = None
+        self.away_shift = np.zeros(0, dtype=np.int64)
+
+    def corner(self, i):
+        """Lower-left corner of the i-th free cell."""
+        cx, cy = divmod(int(self.free_cells[i]), self.ny)
+        return self.x0 + cx * self.cell_size, self.y0 + cy * self.cell_size
+
+    def excluded_near(self, px, py, min_dist, key_size=20):
+        """Sorted table positions of free cells that may lie within min_dist of (px, py).
+
+        Distances are measured to the whole key_size cell holding the point,
+        so every cell not returned is safely far from anywhere in it.
+        """
+        cs = self.cell_size
+        kx = math.floor(px / key_size)
+        ky = math.floor(py / key_size)
+        lo_x = kx * key_size - min_dist
+        hi_x = (kx + 1) * key_size + min_dist
+        lo_y = ky * key_size - min_dist
+        hi_y = (ky + 1) * key_size + min_dist
+        c0 = max(0, math.floor((lo_x - self.x0) / cs) - 1)
+        c1 = min(self.nx, math.ceil((hi_x - self.x0) / cs) + 1)
+        r0 = max(0, math.floor((lo_y - self.y0) / cs) - 1)
+        r1 = min(self.ny, math.ceil((hi_y - self.y0) / cs) + 1)
+        if c0 >= c1 or r0 >= r1:
+            return np.zeros(0, dtype=np.int64)
+        # Each grid column in the window is one contiguous slice of the table
+        cols = np.arange(c0, c1)
+        starts = np.searchsorted(self.free_cells, cols * self.ny + r0)
+        stops = np.searchsorted(self.free_cells, cols * self.ny + r1)
+        lengths = stops - starts
+        if not lengths.sum():
+            return np.zeros(0, dtype=np.int64)
+        pos = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        cells = self.free_cells[pos]
+        cell_x = self.x0 + (cells // self.ny) * cs
+        cell_y = self.y0 + (cells % self.ny) * cs
+        gap_x = np.maximum(0, np.maximum(kx * key_size - (cell_x + cs), cell_x - (kx + 1) * key_size))
+        gap_y = np.maximum(0, np.maximum(ky * key_size - (cell_y + cs), cell_y - (ky + 1) * key_size))
+        return pos[np.hypot(gap_x, gap_y) <= min_dist]
+
+    def sample(self, rng, away_from=None, min_dist=0):
+        """Random valid (x, y), optionally more than min_dist from the point away_from."""
+        total = len(self.free_cells)
+        if not total:
+            raise ValueError(f"no free space for radius {self.radius}")
+        shift = None
+        if away_from is not None:
+            key = (math.floor(away_from[0] / 20), math.floor(away_from[1] / 20), min_dist)
+            if key != self.away_key:
+                excluded = self.excluded_near(away_from[0], away_from[1], min_dist)
+                # Excluded entry j has shift[j] allowed cells before it
+                self.away_shift = excluded - np.arange(len(excluded))
+                self.away_key = key
+            shift = self.away_shift
+        if shift is not None and len(shift) < total:
+            # k-th allowed cell = k plus the excluded cells at or before it
+            k = rng.randrange(total - len(shift))
+            i = k + int(np.searchsorted(shift, k, side='right'))
+        else:  # Nowhere far enough: fall back to any free cell
+            i = rng.randrange(total)
+        cx, cy = self.corner(i)
+        return cx + rng.random() * self.cell_size, cy + rng.random() * self.cell_size
+
+
+def generate_maze(cols, rows, cell_size=60, height=50, seed=None):
+    """Carve a perfect maze of cols x rows cells with an iterative backtracker.
+
+    The maze is centred on the origin and returned as merged wall segments
+    [x1, y1, x2, y2, height], one per straight run of wall.
+    """
+    rng = random.Random(seed)
+    # h_walls[c, r]: wall under cell (c, r); v_walls[c, r]: wall left of it
+    h_walls = np.ones((cols, rows + 1), dtype=bool)
+    v_walls = np.ones((cols + 1, rows), dtype=bool)
+    seen = np.zeros((cols, rows), dtype=bool)
+    seen[0, 0] = True
+    stack = [(0, 0)]
+    while stack:
+        c, r = stack[-1]
+        options = []
+        if c > 0 and not seen[c - 1, r]:
+            options.append((c - 1, r))
+        if c < cols - 1 and not seen[c + 1, r]:
+            options.append((c + 1, r))
+        if r > 0 and not seen[c, r - 1]:
+            options.append((c, r - 1))
+        if r < rows - 1 and not seen[c, r + 1]:
+            options.append((c, r + 1))
+        if not options:
+            stack.pop()
+            continue
+        nc, nr = rng.choice(options)
+        if nc != c:
+            v_walls[max(c, nc), r] = False
+        else:
+            h_walls[c, max(r, nr)] = False
+        seen[nc, nr] = True
+        stack.append((nc, nr))
+
+    x0 = -cols * cell_size / 2
+    y0 = -rows * cell_size / 2
+    walls = []
+    for r in range(rows + 1):
+        y = y0 + r * cell_size
+        for s, e, present in _runs(h_walls[:, r]):
+            if present:
+                walls.append([x0 + s * cell_size, y, x0 + e * cell_size, y, height])
+    for c in range(cols + 1):
+        x = x0 + c * cell_size
+        for s, e, present in _runs(v_walls[c]):
+            if present:
+                walls.append([x, y0 + s * cell_size, x, y0 + e * cell_size, height])
+    return walls
+
+
+def wall_extent(walls):
+    """(x0, y0, x1, y1) bounding box of all wall end points."""
+    xs = [c for wall in walls for c in (wall[0], wall[2])] or [0]
+    ys = [c for wall in walls for c in (wall[1], wall[3])] or [0]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class MazeData:
+    """A maze layout together with all collision, navigation, spawn and mesh data.
+
+    Building from walls derives everything in Python; save() writes it all to
+    one compressed .npz file so load() only has to unpack arrays.
+    """
+
+    def __init__(self, walls, start=(50, 50), nav_cell_size=20, spawn_cell_size=5,
+                 spawn_radii=(20, 10), compiled=None):
+        compiled = compiled or {}
+        self.walls = [list(wall) for wall in walls]
+        self.start = tuple(start)
+        self.extent = wall_extent(self.walls)
+        self.nav_cell_size = nav_cell_size
+        self.spawn_cell_size = spawn_cell_size
+        x0, y0, x1, y1 = self.extent
+        self.spawn_bounds = (x0 + 10, y0 + 10, x1 - 10, y1 - 10)
+
+        self.wall_index = WallGrid([])
+        if 'grid_keys' in compiled:
+            self.wall_index.load_arrays(compiled['grid_keys'], compiled['grid_offsets'],
+                                        compiled['grid_members'], compiled['grid_segments'])
+        else:
+            self.wall_index.build(self.walls)
+        links = None
+        if 'nav_link_offsets' in compiled and 'nav_links' in compiled:
+            links = (compiled['nav_link_offsets'], compiled['nav_links'])
+        self.nav = NavGrid(self.wall_index, self.walls, nav_cell_size, free=compiled.get('nav_free'), links=links)
+        self.spawns = {}
+        for i, radius in enumerate(spawn_radii):
+            self.spawns[radius] = SpawnSampler(self.wall_index, radius, self.spawn_bounds, spawn_cell_size,
+                                               compiled.get(f'spawn_cells_{i}'))
+        self._mesh = None
+        if 'mesh' in compiled and 'mesh_owners' in compiled:
+            self._mesh = (compiled['mesh'], compiled['mesh_owners'])
+
+    @property
+    def mesh(self):
+        """Merged wall quads from build_wall_mesh, built on first use."""
+        return self.mesh_data[0]
+
+    @property
+    def mesh_owners(self):
+        """Owning wall footprint of each quad in mesh."""
+        return self.mesh_data[1]
+
+    @property
+    def mesh_data(self):
+        """(mesh, mesh_owners), built together on first use."""
+        if self._mesh is None:
+            self._mesh = build_wall_mesh(self.walls)
+        return self._mesh
+
+    def save(self, path):
+        """Write walls and every derived table to a compressed .npz file."""
+        keys, offsets, members, segments = self.wall_index.to_arrays()
+        arrays = {
+            'version': np.array([MAZE_FILE_VERSION]),
+            'walls': np.array(self.walls, dtype=float).reshape(-1, 5),
+            'start': np.array(self.start, dtype=float),
+            'cell_sizes': np.array([self.nav_cell_size, self.spawn_cell_size], dtype=float),
+            'spawn_radii': np.array(list(self.spawns), dtype=float),
+            'grid_keys': keys,
+            'grid_offsets': offsets,
+            'grid_members': members,
+            'grid_segments': segments,
+            'nav_free': self.nav.free,
+            'nav_link_offsets': self.nav.link_offsets,
+            'nav_links': self.nav.links,
+            'mesh': self.mesh,
+            'mesh_owners': self.mesh_owners,
+        }
+        for i, sampler in enumerate(self.spawns.values()):
+            arrays[f'spawn_cells_{i}'] = sampler.free_cells
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a maze written by save()."""
+        with np.load(path) as data:
+            if int(data['version'][0]) != MAZE_FILE_VERSION:
+                raise ValueError(f"{path}: unsupported maze file version {int(data['version'][0])}")
+            compiled = {name: data[name] for name in data.files}
+        nav_cell_size, spawn_cell_size = compiled['cell_sizes'].tolist()
+        return cls(compiled['walls'].tolist(), compiled['start'].tolist(), nav_cell_size, spawn_cell_size,
+                   compiled['spawn_radii'].tolist(), compiled)
+
+
+def generate_maze_data(cols, rows, cell_size=60, seed=None):
+    """Generated maze with nav and spawn grids scaled to its corridor width.
+
+    Nav cells are a third of a corridor, so agents are routed along its
+    middle row instead of cutting corners into the walls.
+    """
+    walls = generate_maze(cols, rows, cell_size, seed=seed)
+    x0, y0, _, _ = wall_extent(walls)
+    start = (x0 + cell_size / 2, y0 + cell_size / 2)
+    return MazeData(walls, start, nav_cell_size=cell_size / 3, spawn_cell_size=cell_size / 6)
+
+
+def benchmark_load(sizes=(25, 50, 100, 200)):
+    """Print build, save and load times for generated mazes of growing size."""
+    import os
+    import tempfile
+    print(f"{'cells':>9} {'walls':>7} {'build s':>8} {'load s':>7} {'file KB':>8}")
+    for size in sizes:
+        start = time.perf_counter()
+        maze = generate_maze_data(size, size, seed=size)
+        maze.mesh
+        built = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'maze.npz')
+            maze.save(path)
+            start = time.perf_counter()
+            MazeData.load(path)
+            loaded = time.perf_counter() - start
+            kb = os.path.getsize(path) / 1024
+        print(f"{size:>4}x{size:<4} {len(maze.walls):>7} {built:>8.3f} {loaded:>7.3f} {kb:>8.0f}")
+
+
+if __name__ == "__main__":
+    # python pacman_maze.py                          -> load-time table
+    # python pacman_maze.py COLS ROWS OUT.npz [SEED] -> write a generated maze
+    if len(sys.argv) >= 4:
+        generate_maze_data(int(sys.argv[1]), int(sys.argv[2]),
+                           seed=int(sys.argv[4]) if len(sys.argv) > 4 else None).save(sys.argv[3])
+    else:
+        benchmark_load()
@@ -0,0 +1,107 @@
+import struct
+
+# Binary input recording:
+#   header  magic, version, RNG seed, flags, maze file path
+#   events  varint tick delta, kind, value (3 bytes for almost every event)
+#   trailer END kind, final tick and the digest of the final game state
+# A file without trailer (the game was killed) still replays up to its last event.
+MAGIC = b'PMRP'
+REPLAY_FILE_VERSION = 1
+HEADER = struct.Struct('<4sBqBH')
+TRAILER = struct.Struct('<Q16s')
+FLAG_ENTITY_ARRAYS = 1
+
+# Event kinds. Values: KEY the key byte, SPECIAL the GLUT special key code,
+# MOUSE the GLUT button * 2 + state
+END = 0
+KEY = 1
+SPECIAL = 2
+MOUSE = 3
+
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, pos):
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+class Recorder:
+    """Append input events with the tick they arrived before to a recording file."""
+
+    def __init__(self, path, seed, use_arrays=False, maze_file=None):
+        maze = (maze_file or '').encode()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, REPLAY_FILE_VERSION, seed,
+                                    FLAG_ENTITY_ARRAYS if use_arrays else 0, len(maze)) + maze)
+        self.last_tick = 0
+
+    def add(self, tick, kind, value):
+        out = bytearray()
+        _write_varint(out, tick - self.last_tick)
+        out += bytes((kind, value))
+        self.file.write(out)
+        self.last_tick = tick
+
+    def close(self, tick, digest):
+        """Write the trailer with the final tick and PacmanSim.state_digest() and close the file."""
+        if self.file.closed:
+            return
+        out = bytearray()
+        _write_varint(out, tick - self.last_tick)
+        out += bytes((END, 0))
+        self.file.write(bytes(out) + TRAILER.pack(tick, digest))
+        self.file.close()
+
+
+class Recording:
+    """A recording read back into memory: seed, settings and (tick, kind, value) events."""
+
+    def __init__(self, seed, use_arrays, maze_file, events, final_tick, digest):
+        self.seed = seed
+        self.use_arrays = use_arrays
+        self.maze_file = maze_file
+        self.events = events
+        self.final_tick = final_tick
+        self.digest = digest  # None when the recording was cut off
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, flags, maze_len = HEADER.unpack_from(data)
+        if magic != MAGIC or version != REPLAY_FILE_VERSION:
+            raise ValueError(f"{path}: not a version {REPLAY_FILE_VERSION} Pacman recording")
+        pos = HEADER.size
+        maze_file = data[pos:pos + maze_len].decode() or None
+        pos += maze_len
+        events = []
+        tick = 0
+        final_tick = digest = None
+        while pos < len(data):
+            try:
+                delta, pos = _read_varint(data, pos)
+                kind, value = data[pos], data[pos + 1]
+            except IndexError:
+                break  # Partial event at the end of a cut-off file
+            pos += 2
+            tick += delta
+            if kind == END:
+                if len(data) - pos >= TRAILER.size:
+                    final_tick, digest = TRAILER.unpack_from(data, pos)
+                break
+            events.append((tick, kind, value))
+        if final_tick is None:
+            final_tick = tick
+        return cls(seed, bool(flags & FLAG_ENTITY_ARRAYS), maze_file, events, final_tick, digest)
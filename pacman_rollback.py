@@ -0,0 +1,214 @@
+import socket
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+from pacman_sim import FIRE, TICK
+
+# Inputs of one player for one tick, as a bit mask over INPUT_KEYS. Keys are
+# applied in this order, player 1 before player 2; repeats within a tick count once.
+INPUT_KEYS = (b'w', b's', b'a', b'd', FIRE, b'r')
+
+# Input packet: first frame, highest remote frame received in order, input count
+PACKET = struct.Struct('<iiH')
+MAX_PACKET_INPUTS = 64
+
+# Delta header: length of the first and second snapshot, changed 8-byte words
+DELTA_HEADER = struct.Struct('<III')
+
+
+def encode_inputs(keys):
+    mask = 0
+    for key in keys:
+        if key in INPUT_KEYS:
+            mask |= 1 << INPUT_KEYS.index(key)
+    return mask
+
+
+def decode_inputs(mask):
+    return [key for i, key in enumerate(INPUT_KEYS) if mask >> i & 1]
+
+
+def delta_encode(prev, cur):
+    """XOR delta between two snapshots: the changed 8-byte words and their XOR.
+
+    The delta is symmetric, so delta_apply turns either snapshot into the other.
+    """
+    size = -(-max(len(prev), len(cur)) // 8) * 8
+    a = np.zeros(size, dtype=np.uint8)
+    b = np.zeros(size, dtype=np.uint8)
+    a[:len(prev)] = np.frombuffer(prev, dtype=np.uint8)
+    b[:len(cur)] = np.frombuffer(cur, dtype=np.uint8)
+    xor = a.view(np.uint64) ^ b.view(np.uint64)
+    changed = np.flatnonzero(xor)
+    return b''.join((DELTA_HEADER.pack(len(prev), len(cur), len(changed)),
+                     changed.astype('<u4').tobytes(), xor[changed].astype('<u8').tobytes()))
+
+
+def delta_apply(delta, buf):
+    """The snapshot at the other end of `delta` from `buf`."""
+    len_a, len_b, count = DELTA_HEADER.unpack_from(delta)
+    if len(buf) not in (len_a, len_b):
+        raise ValueError("snapshot does not belong to this delta")
+    size = -(-max(len_a, len_b) // 8) * 8
+    out = np.zeros(size, dtype=np.uint8)
+    out[:len(buf)] = np.frombuffer(buf, dtype=np.uint8)
+    changed = np.frombuffer(delta, dtype='<u4', count=count, offset=DELTA_HEADER.size)
+    xor = np.frombuffer(delta, dtype='<u8', count=count, offset=DELTA_HEADER.size + 4 * count)
+    out.view(np.uint64)[changed] ^= xor
+    return out[:len_a if len(buf) == len_b else len_b].tobytes()
+
+
+class SnapshotHistory:
+    """Snapshots of consecutive frames: the newest in full, older ones as deltas walking back from it."""
+
+    def __init__(self, size):
+        self.size = size
+        self.latest = None
+        self.latest_frame = None
+        self.deltas = deque()  # deltas[-1] links latest_frame - 1 and latest_frame
+
+    def push(self, frame, snapshot):
+        if self.latest is not None:
+            if frame != self.latest_frame + 1:
+                raise ValueError(f"frame {frame} does not follow {self.latest_frame}")
+            self.deltas.append(delta_encode(self.latest, snapshot))
+            if len(self.deltas) > self.size:
+                self.deltas.popleft()
+        self.latest = snapshot
+        self.latest_frame = frame
+
+    def oldest_frame(self):
+        return self.latest_frame - len(self.deltas)
+
+    def get(self, frame):
+        buf = self.latest
+        for delta in list(self.deltas)[::-1][:self.latest_frame - frame]:
+            buf = delta_apply(delta, buf)
+        return buf
+
+    def truncate(self, frame):
+        """Forget `frame` and everything after it."""
+        if frame <= self.oldest_frame():
+            self.latest = self.latest_frame = None
+            self.deltas.clear()
+            return
+        self.latest = self.get(frame - 1)
+        for _ in range(self.latest_frame - frame + 1):
+            self.deltas.pop()
+        self.latest_frame = frame - 1
+
+
+class RollbackSession:
+    """Two-player PacmanSim over UDP with rollback.
+
+    Both peers run the same sim, seed and maze; the players share the one
+    Pacman, and every tick applies player 1's inputs then player 2's. Local
+    input is used immediately and the remote player's is predicted as
+    nothing until it arrives; when it arrives late and differs, the sim is
+    restored to the snapshot before that tick and re-simulated. The local
+    side stalls rather than run more than max_rollback ticks ahead of the
+    last remote input it has.
+    """
+
+    def __init__(self, sim, player, local_port, remote_port, host='127.0.0.1', max_rollback=8):
+        self.sim = sim
+        self.player = player  # 0 or 1
+        self.max_rollback = max_rollback
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, local_port))
+        self.sock.setblocking(False)
+        self.remote = (host, remote_port)
+        self.frame = 0  # Next frame to simulate
+        self.local_inputs = {}
+        self.remote_inputs = {}
+        self.predicted = {}  # Remote input each simulated, unconfirmed frame was run with
+        self.remote_confirmed = -1  # Remote inputs are known for every frame up to here
+        self.remote_ack = -1  # The peer has our inputs up to here
+        self.mispredicted = None  # Earliest frame run with a wrong remote input
+        self.history = SnapshotHistory(max_rollback + 1)
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.stalls = 0
+        self.rollback_time = 0.0
+
+    def close(self):
+        self.sock.close()
+
+    def send(self):
+        first = max(self.remote_ack + 1, self.frame - MAX_PACKET_INPUTS)
+        inputs = bytes(self.local_inputs[f] for f in range(first, self.frame + 1) if f in self.local_inputs)
+        self.sock.sendto(PACKET.pack(first, self.remote_confirmed, len(inputs)) + inputs, self.remote)
+
+    def poll(self):
+        """Take in every waiting packet from the peer."""
+        while True:
+            try:
+                data = self.sock.recv(PACKET.size + 256)
+            except BlockingIOError:
+                return
+            except ConnectionRefusedError:  # The peer is not up yet
+                continue
+            first, ack, count = PACKET.unpack_from(data)
+            self.remote_ack = max(self.remote_ack, ack)
+            for f, mask in enumerate(data[PACKET.size:PACKET.size + count], first):
+                if f <= self.remote_confirmed or f in self.remote_inputs:
+                    continue
+                self.remote_inputs[f] = mask
+                guess = self.predicted.pop(f, mask)
+                if guess != mask and (self.mispredicted is None or f < self.mispredicted):
+                    self.mispredicted = f
+            while self.remote_confirmed + 1 in self.remote_inputs:
+                self.remote_confirmed += 1
+
+    def simulate(self, frame):
+        """Save the state before `frame` and run it with the best inputs known."""
+        self.history.push(frame, self.sim.snapshot())
+        local = self.local_inputs.get(frame, 0)
+        remote = self.remote_inputs.get(frame)
+        if remote is None:
+            remote = self.predicted[frame] = 0
+        first, second = (local, remote) if self.player == 0 else (remote, local)
+        self.sim.step(TICK, decode_inputs(first) + decode_inputs(second))
+
+    def rollback(self):
+        """Re-run every frame from the earliest mispredicted one with the corrected inputs."""
+        if self.mispredicted is None:
+            return
+        start = time.perf_counter()
+        frame = self.mispredicted
+        self.mispredicted = None
+        self.sim.restore(self.history.get(frame))
+        self.history.truncate(frame)
+        for f in range(frame, self.frame):
+            self.simulate(f)
+        self.rollbacks += 1
+        self.resimulated += self.frame - frame
+        self.rollback_time = time.perf_counter() - start
+
+    def sync(self):
+        """Exchange inputs and apply any corrections without advancing."""
+        self.poll()
+        self.rollback()
+        self.send()
+
+    def advance(self, keys):
+        """Run the next frame with the local `keys`; returns False (and runs nothing) while stalled."""
+        self.poll()
+        self.rollback()
+        if self.frame - self.remote_confirmed - 1 >= self.max_rollback:
+            self.stalls += 1
+            self.send()
+            return False
+        self.local_inputs[self.frame] = encode_inputs(keys)
+        self.send()
+        self.simulate(self.frame)
+        self.frame += 1
+        # Inputs of frames that are confirmed on both sides are never needed again
+        done = min(self.remote_ack, self.remote_confirmed)
+        for inputs in (self.local_inputs, self.remote_inputs):
+            for f in [f for f in inputs if f <= done]:
+                del inputs[f]
+        return True
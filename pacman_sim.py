@@ -0,0 +1,382 @@
+import hashlib
+import math
+import random
+import struct
+import sys
+import time
+from array import array
+from itertools import chain
+
+import numpy as np
+
+from pacman_entities import BulletArrays, EnemyArrays
+from pacman_maze import FlowField, MazeData, box_exit_distance
+
+# Maze and game constants
+WALL_HEIGHT = 50
+BULLET_SPEED = 3
+ENEMY_SPEED = 0.5
+ENEMY_COUNT = 4
+POWERUP_COUNT = 2
+PLAYER_SPEED = 5
+TICK = 1 / 60  # Fixed simulation step in seconds
+BULLET_MARGIN = 300  # Bullets vanish this far outside the maze extent
+ENEMY_SPAWN_DISTANCE = 100  # Minimum distance from the player for new enemies
+BULLET_POOL = 1024  # Live bullet slots preallocated by the array path; shots past it are dropped
+
+# Snapshot header: tick, life, score, bullets missed, game over, player x/y/z/angle and
+# enemy/bullet/power-up counts. It is followed by the RNG state (625 words plus the
+# cached gauss value, NaN for none) and then the entity floats.
+SNAPSHOT_HEADER = struct.Struct('<qqqq?4d3I')
+RNG_WORDS = 625
+RNG_STATE_SIZE = 4 * RNG_WORDS + 8
+
+# Input that fires a bullet; every other input is a keyboard key as GLUT sends it
+FIRE = 'fire'
+
+# Maze layout: list of [x1, y1, x2, y2, height] for walls
+MAZE_WALLS = [
+    # Outer walls
+    [-300, -300, 300, -300, WALL_HEIGHT],  # Bottom
+    [-300, 300, 300, 300, WALL_HEIGHT],    # Top
+    [-300, -300, -300, 300, WALL_HEIGHT],  # Left
+    [300, -300, 300, 300, WALL_HEIGHT],    # Right
+    # Inner walls (simple maze layout)
+    [-100, -300, -100, 100, WALL_HEIGHT],  # Vertical left
+    [100, -100, 100, 300, WALL_HEIGHT],    # Vertical right
+    [-300, 0, 0, 0, WALL_HEIGHT],          # Horizontal middle-left
+    [100, 100, 300, 100, WALL_HEIGHT],     # Horizontal top-right
+]
+
+
+def _rows(values, width):
+    """Split a flat sequence into lists of `width` values."""
+    it = iter(values)
+    return [list(row) for row in zip(*[it] * width)]
+
+
+class PacmanSim:
+    """Headless Pacman game state and rules, advanced only through step()."""
+
+    def __init__(self, walls=None, seed=None, use_arrays=False,
+                 enemy_count=ENEMY_COUNT, powerup_count=POWERUP_COUNT, maze=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.rng_state = None  # Packed rng state for snapshots; cleared whenever rng is drawn from
+        self.use_arrays = use_arrays  # Batched NumPy update path for bullets/enemies
+        self.enemy_count = enemy_count
+        self.powerup_count = powerup_count
+        self.maze_version = 0  # Bumped on every layout change so renderers can rebuild
+        if maze is None:
+            maze = MazeData(MAZE_WALLS if walls is None else walls)
+        self.set_maze(maze)
+        self.reset()
+
+    def set_walls(self, walls):
+        """Replace the maze layout and rebuild the collision and navigation data."""
+        self.set_maze(MazeData(walls))
+
+    def set_maze(self, maze):
+        """Switch to a built or loaded MazeData; takes effect for positions on reset()."""
+        self.maze = maze
+        self.walls = maze.walls
+        self.wall_index = maze.wall_index
+        self.flow = FlowField(maze.nav)  # Own field; maze.nav is shared by every sim on the maze
+        self.enemy_spawns = maze.spawns[20]
+        self.powerup_spawns = maze.spawns[10]
+        x0, y0, x1, y1 = maze.extent
+        self.bullet_box = (x0 - BULLET_MARGIN, y0 - BULLET_MARGIN, x1 + BULLET_MARGIN, y1 + BULLET_MARGIN)
+        self.maze_version += 1
+
+    def reset(self):
+        """Initialize or reset game state."""
+        # Positions and angles are always floats so a restored snapshot is identical to the original
+        self.player_pos = [float(self.maze.start[0]), float(self.maze.start[1]), 20.0]  # Player position (x, y, z) in maze
+        self.player_angle = 0.0
+        self.life = 5
+        self.score = 0
+        self.bullets_missed = 0
+        self.game_over = False
+        self.tick = 0
+        if self.use_arrays:
+            self.bullets = BulletArrays(BULLET_POOL, fixed=True)
+            self.enemies = EnemyArrays()
+        else:
+            self.bullets = []  # [x, y, z, angle, travelled, impact]
+            self.enemies = []  # [x, y, z]
+        self.powerups = []  # [x, y, z]
+        for _ in range(self.enemy_count):
+            self.spawn_enemy()
+        for _ in range(self.powerup_count):
+            self.spawn_powerup()
+
+    def state_digest(self):
+        """16-byte hash of the full game state, for checking that two runs ended up identical."""
+        state = (self.tick, self.score, self.life, self.bullets_missed, self.game_over,
+                 self.player_pos, self.player_angle, list(self.enemies), list(self.bullets),
+                 self.powerups, self.rng.getstate())
+        return hashlib.blake2b(repr(state).encode(), digest_size=16).digest()
+
+    def snapshot(self):
+        """The complete game state as one flat bytes buffer; see restore()."""
+        if self.rng_state is None:
+            version, words, gauss = self.rng.getstate()
+            self.rng_state = array('I', words).tobytes() + struct.pack('<d', math.nan if gauss is None else gauss)
+        x, y, z = self.player_pos
+        header = SNAPSHOT_HEADER.pack(self.tick, self.life, self.score, self.bullets_missed, self.game_over,
+                                      x, y, z, self.player_angle,
+                                      len(self.enemies), len(self.bullets), len(self.powerups))
+        if self.use_arrays:
+            enemies = self.enemies.data[:, :self.enemies.count].tobytes()
+            bullets = self.bullets.data[:, :self.bullets.count].tobytes()
+        else:
+            enemies = array('d', chain.from_iterable(self.enemies)).tobytes()
+            bullets = array('d', chain.from_iterable(self.bullets)).tobytes()
+        powerups = array('d', chain.from_iterable(self.powerups)).tobytes()
+        return b''.join((header, self.rng_state, enemies, bullets, powerups))
+
+    def restore(self, buf):
+        """Return to the state of a snapshot() taken from a sim with the same maze and use_arrays."""
+        (self.tick, self.life, self.score, self.bullets_missed, self.game_over, x, y, z, self.player_angle,
+         n_enemies, n_bullets, n_powerups) = SNAPSHOT_HEADER.unpack_from(buf)
+        self.player_pos = [x, y, z]
+        pos = SNAPSHOT_HEADER.size
+        rng_state = bytes(buf[pos:pos + RNG_STATE_SIZE])
+        pos += RNG_STATE_SIZE
+        # The RNG only moves when something spawns, so it rarely needs setting
+        if rng_state != self.rng_state:
+            words = array('I')
+            words.frombytes(rng_state[:4 * RNG_WORDS])
+            gauss, = struct.unpack_from('<d', rng_state, 4 * RNG_WORDS)
+            self.rng.setstate((3, tuple(words), None if math.isnan(gauss) else gauss))
+            self.rng_state = rng_state
+        floats = array('d')
+        floats.frombytes(buf[pos:])
+        if self.use_arrays:
+            enemy_size = len(self.enemies.fields) * n_enemies
+            bullet_size = len(self.bullets.fields) * n_bullets
+            self.enemies.load(floats[:enemy_size], n_enemies)
+            self.bullets.load(floats[enemy_size:enemy_size + bullet_size], n_bullets)
+        else:
+            enemy_size = 3 * n_enemies
+            bullet_size = 6 * n_bullets
+            self.enemies = _rows(floats[:enemy_size], 3)
+            self.bullets = _rows(floats[enemy_size:enemy_size + bullet_size], 6)
+        self.powerups = _rows(floats[enemy_size + bullet_size:], 3)
+
+    def spawn_enemy(self):
+        """Spawn an enemy at a random valid position away from the player."""
+        self.rng_state = None
+        x, y = self.enemy_spawns.sample(self.rng, self.player_pos, ENEMY_SPAWN_DISTANCE)
+        self.enemies.append([x, y, 20.0])
+
+    def spawn_powerup(self):
+        """Spawn a power-up at a random valid position."""
+        self.rng_state = None
+        x, y = self.powerup_spawns.sample(self.rng)
+        self.powerups.append([x, y, 20.0])
+
+    def is_valid_position(self, x, y, radius):
+        """Check if position is valid (no collision with walls)."""
+        return self.wall_index.is_free(x, y, radius)
+
+    def apply_input(self, key):
+        """Apply one player input: a keyboard key (b'w', b'a', ...) or FIRE."""
+        if self.game_over:
+            if key == b'r':
+                self.reset()
+            return
+        if key == b'w' or key == b's':  # Move forward / backward
+            sign = 1 if key == b'w' else -1
+            rad = math.radians(self.player_angle)
+            new_x = self.player_pos[0] + sign * PLAYER_SPEED * math.sin(rad)
+            new_y = self.player_pos[1] + sign * PLAYER_SPEED * math.cos(rad)
+            if self.is_valid_position(new_x, new_y, 20):
+                self.player_pos[0] = new_x
+                self.player_pos[1] = new_y
+        elif key == b'a':  # Turn left (counterclockwise)
+            self.player_angle = (self.player_angle + 5) % 360
+        elif key == b'd':  # Turn right (clockwise)
+            self.player_angle = (self.player_angle - 5) % 360
+        elif key == FIRE:
+            rad = math.radians(self.player_angle)
+            bx = self.player_pos[0] + 20 * math.sin(rad)
+            by = self.player_pos[1] + 20 * math.cos(rad)
+            bz = self.player_pos[2]
+            impact = self.bullet_range(bx, by, rad)
+            if self.use_arrays:
+                self.bullets.fire(bx, by, bz, self.player_angle, impact)
+            else:
+                self.bullets.append([bx, by, bz, self.player_angle, 0.0, impact])
+
+    def bullet_range(self, bx, by, rad):
+        """Distance a bullet fired from (bx, by) at heading `rad` flies before it hits a wall or leaves the maze."""
+        dx = math.sin(rad)
+        dy = math.cos(rad)
+        limit = box_exit_distance(bx, by, dx, dy, self.bullet_box)
+        return self.wall_index.ray_cast(bx, by, dx, dy, 5, limit)
+
+    def step(self, dt=TICK, inputs=()):
+        """Apply `inputs` in order, then advance the game by `dt` seconds."""
+        for key in inputs:
+            self.apply_input(key)
+        self.tick += 1
+        if self.game_over:
+            return
+        if self.use_arrays:
+            self.update_entity_arrays(dt)
+        else:
+            self.update_entity_lists(dt)
+        self.update_powerups()
+
+    def update_entity_lists(self, dt):
+        """Update bullets and enemies stored as lists of lists."""
+        # Update bullets in place, sliding survivors down over spent rows;
+        # walls were resolved by the ray cast at fire time
+        bullets = self.bullets
+        kept = 0
+        for bullet in bullets:
+            travelled = bullet[4] + BULLET_SPEED * dt * 60
+            if travelled < bullet[5]:
+                rad = math.radians(bullet[3])
+                bullet[0] += BULLET_SPEED * math.sin(rad) * dt * 60
+                bullet[1] += BULLET_SPEED * math.cos(rad) * dt * 60
+                bullet[4] = travelled
+                bullets[kept] = bullet
+                kept += 1
+            else:
+                self.bullets_missed += 1
+                if self.bullets_missed >= 10:
+                    self.game_over = True
+        del bullets[kept:]
+
+        # Update enemies along the flow field toward the player
+        px, py, pz = self.player_pos
+        self.flow.update(px, py)
+        for enemy in self.enemies:
+            ex, ey, ez = enemy
+            tx, ty = self.flow.target(ex, ey, px, py)
+            dx = tx - ex
+            dy = ty - ey
+            dist = math.hypot(dx, dy)
+            if dist > 5:
+                dx /= dist
+                dy /= dist
+                new_x = ex + ENEMY_SPEED * dx * dt * 60
+                new_y = ey + ENEMY_SPEED * dy * dt * 60
+                if self.is_valid_position(new_x, new_y, 15):
+                    enemy[0] = new_x
+                    enemy[1] = new_y
+
+        # Check collisions; spawn_enemy appends to the list being walked, so
+        # respawned enemies are checked in this same pass. Each enemy takes the
+        # first unconsumed bullet within reach, found through a spatial hash of
+        # 20-unit cells, and all consumed bullets are dropped together at the end.
+        cells = {}
+        for i, bullet in enumerate(self.bullets):
+            cells.setdefault((math.floor(bullet[0] / 20), math.floor(bullet[1] / 20)), []).append(i)
+        consumed = [False] * len(self.bullets)
+        new_enemies = []
+        for enemy in self.enemies:
+            ex, ey, ez = enemy
+            hit = False
+            if cells:
+                cx = math.floor(ex / 20)
+                cy = math.floor(ey / 20)
+                first = -1
+                for ox in (-1, 0, 1):
+                    for oy in (-1, 0, 1):
+                        for i in cells.get((cx + ox, cy + oy), ()):
+                            if consumed[i] or (first >= 0 and i > first):
+                                continue
+                            bx, by, bz = self.bullets[i][:3]
+                            if math.hypot(bx - ex, by - ey) < 20 and abs(bz - ez) < 20:
+                                first = i
+                if first >= 0:
+                    consumed[first] = True
+                    hit = True
+                    self.score += 10
+            if math.hypot(ex - px, ey - py) < 35 and abs(ez - pz) < 20:
+                self.life -= 1
+                hit = True
+                if self.life <= 0:
+                    self.game_over = True
+            if not hit:
+                new_enemies.append(enemy)
+            else:
+                self.spawn_enemy()
+        if any(consumed):
+            bullets = self.bullets
+            kept = 0
+            for bullet, used in zip(bullets, consumed):
+                if not used:
+                    bullets[kept] = bullet
+                    kept += 1
+            del bullets[kept:]
+        self.enemies = new_enemies
+
+    def update_entity_arrays(self, dt):
+        """Batched update of the NumPy bullet/enemy stores; same rules as the list path."""
+        # Update bullets
+        self.bullets_missed += self.bullets.advance(BULLET_SPEED, dt)
+        if self.bullets_missed >= 10:
+            self.game_over = True
+
+        # Update enemies along the flow field toward the player
+        px, py, pz = self.player_pos
+        self.flow.update(px, py)
+        enemies = self.enemies
+        enemies.pursue(px, py, ENEMY_SPEED, dt, self.wall_index, self.flow)
+
+        # Check collisions. Respawned enemies are appended and checked in later
+        # rounds, in the same order the list path reaches them; hit bullets are
+        # compacted away once at the end.
+        consumed = np.zeros(len(self.bullets), dtype=bool)
+        start = 0
+        while start < len(enemies):
+            shot = enemies.claim_bullets(self.bullets, consumed, start) >= 0
+            contact = enemies.contact_mask(px, py, pz, start)
+            self.score += 10 * int(shot.sum())
+            if contact.any():
+                self.life -= int(contact.sum())
+                if self.life <= 0:
+                    self.game_over = True
+            hit = shot | contact
+            end = len(enemies)
+            for _ in range(int(hit.sum())):
+                self.spawn_enemy()
+            keep = np.ones(len(enemies), dtype=bool)
+            keep[start:end] = ~hit
+            enemies.compact(keep)
+            start = end - int(hit.sum())
+        if consumed.any():
+            self.bullets.compact(~consumed)
+
+    def update_powerups(self):
+        """Check power-up collisions."""
+        new_powerups = []
+        for powerup in self.powerups:
+            px, py, pz = powerup
+            if math.hypot(px - self.player_pos[0], py - self.player_pos[1]) < 30 and abs(pz - self.player_pos[2]) < 20:
+                if self.life < 5:
+                    self.life += 1
+                    self.spawn_powerup()
+            else:
+                new_powerups.append(powerup)
+        self.powerups = new_powerups
+
+
+def benchmark(ticks=100000, seed=0, use_arrays=False):
+    """Run a scripted bot headless at the fixed step and report ticks per second."""
+    sim = PacmanSim(seed=seed, use_arrays=use_arrays)
+    bot = random.Random(seed)
+    keys = [b'w', b'w', b's', b'a', b'd', FIRE]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(TICK, (bot.choice(keys), b'r'))
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:.0f} ticks/s), score {sim.score}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,188 @@
+import multiprocessing as mp
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pacman_maze import MazeData
+from pacman_sim import FIRE, TICK, PacmanSim
+
+# Actions, one per game per step
+NOOP, FORWARD, BACK, LEFT, RIGHT, SHOOT, RESTART = range(7)
+ACTION_INPUTS = [(), (b'w',), (b's',), (b'a',), (b'd',), (FIRE,), (b'r',)]
+
+# Per-game scalars in the observation buffer
+SCALARS = ('tick', 'life', 'score', 'bullets_missed', 'game_over',
+           'player_x', 'player_y', 'player_z', 'player_angle',
+           'enemy_count', 'bullet_count', 'powerup_count')
+
+
+def _layout(num_envs, max_enemies, max_bullets, max_powerups):
+    """(name, shape, dtype, offset) of each array in the shared buffer, and its total size."""
+    arrays = [
+        ('actions', (num_envs,), np.int8),
+        ('scalars', (num_envs, len(SCALARS)), np.float64),
+        ('enemies', (num_envs, max_enemies, 3), np.float64),
+        ('bullets', (num_envs, max_bullets, 3), np.float64),
+        ('powerups', (num_envs, max_powerups, 3), np.float64),
+    ]
+    layout = []
+    offset = 0
+    for name, shape, dtype in arrays:
+        offset = -(-offset // 8) * 8  # Keep every array 8-byte aligned
+        layout.append((name, shape, dtype, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, offset
+
+
+def _views(buf, layout):
+    return {name: np.ndarray(shape, dtype, buf, offset) for name, shape, dtype, offset in layout}
+
+
+def _write_rows(out, rows):
+    """Copy up to len(out) [x, y, z, ...] rows into out; returns the true row count."""
+    count = len(rows)
+    n = min(count, len(out))
+    if n and isinstance(rows, list):
+        out[:n] = [row[:3] for row in rows[:n]]
+    elif n:
+        out[:n] = rows.data[:3, :n].T
+    return count
+
+
+def _observe(sim, scalars, enemies, bullets, powerups):
+    x, y, z = sim.player_pos
+    scalars[:] = (sim.tick, sim.life, sim.score, sim.bullets_missed, sim.game_over,
+                  x, y, z, sim.player_angle,
+                  _write_rows(enemies, sim.enemies), _write_rows(bullets, sim.bullets),
+                  _write_rows(powerups, sim.powerups))
+
+
+def _worker(conn, shm_name, layout, start, stop, seed, maze_file, use_arrays, ticks_per_step):
+    """Own games start..stop-1: step them on every 'step' message and write their observations."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _views(shm.buf, layout)
+    actions = views['actions']
+    maze = MazeData.load(maze_file) if maze_file else None
+    sims = [PacmanSim(seed=seed + i, use_arrays=use_arrays, maze=maze) for i in range(start, stop)]
+    out = [(views['scalars'][i], views['enemies'][i], views['bullets'][i], views['powerups'][i])
+           for i in range(start, stop)]
+    for sim, obs in zip(sims, out):
+        _observe(sim, *obs)
+    conn.send(None)
+    while True:
+        command = conn.recv()
+        if command == 'step':
+            for i, (sim, obs) in enumerate(zip(sims, out), start):
+                inputs = ACTION_INPUTS[actions[i]]
+                for _ in range(ticks_per_step):
+                    sim.step(TICK, inputs)
+                    inputs = ()
+                _observe(sim, *obs)
+        elif command == 'reset':
+            for sim, obs in zip(sims, out):
+                sim.reset()
+                _observe(sim, *obs)
+        else:
+            break
+        conn.send(None)
+    # Views must go before the mapping can be closed
+    views = actions = out = None
+    shm.close()
+
+
+class VecPacman:
+    """N independent PacmanSim games stepped in lockstep by a pool of worker processes.
+
+    Actions go in and observations come out through one shared-memory
+    buffer, read here as NumPy views: `scalars` (N, len(SCALARS)), and
+    `enemies`, `bullets`, `powerups` (N, max_*, 3) positions. Only the first
+    `*_count` rows of each game are valid; counts above the buffer size are
+    reported in full but their extra rows are dropped. Messages to workers
+    are one word per step, so nothing is pickled per game.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=0, maze_file=None, use_arrays=False,
+                 ticks_per_step=1, max_enemies=16, max_bullets=64, max_powerups=8):
+        self.num_envs = num_envs
+        workers = min(workers or os.cpu_count() or 1, num_envs)
+        layout, size = _layout(num_envs, max_enemies, max_bullets, max_powerups)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        views = _views(self.shm.buf, layout)
+        self.actions = views['actions']
+        self.scalars = views['scalars']
+        self.enemies = views['enemies']
+        self.bullets = views['bullets']
+        self.powerups = views['powerups']
+        self.conns = []
+        self.processes = []
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            parent, child = mp.Pipe()
+            process = mp.Process(target=_worker, daemon=True,
+                                 args=(child, self.shm.name, layout, start, stop, seed, maze_file,
+                                       use_arrays, ticks_per_step))
+            process.start()
+            self.conns.append(parent)
+            self.processes.append(process)
+        self._wait()
+
+    def column(self, name):
+        """One per-game scalar (see SCALARS) as a live (N,) view."""
+        return self.scalars[:, SCALARS.index(name)]
+
+    def _broadcast(self, command):
+        for conn in self.conns:
+            conn.send(command)
+        self._wait()
+
+    def _wait(self):
+        for conn in self.conns:
+            conn.recv()
+
+    def step(self, actions):
+        """Apply one action per game (NOOP, FORWARD, ..., RESTART) and advance every game."""
+        self.actions[:] = actions
+        self._broadcast('step')
+
+    def reset(self):
+        self._broadcast('reset')
+
+    def close(self):
+        if self.shm is None:
+            return
+        for conn in self.conns:
+            conn.send('close')
+        for process in self.processes:
+            process.join()
+        self.actions = self.scalars = self.enemies = self.bullets = self.powerups = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark(num_envs=64, steps=500, workers=None, seed=0):
+    """Step num_envs games with random actions and report game steps per second."""
+    rng = np.random.default_rng(seed)
+    with VecPacman(num_envs, workers, seed) as env:
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(rng.integers(0, len(ACTION_INPUTS), num_envs))
+        elapsed = time.perf_counter() - start
+        print(f"{len(env.processes)} workers: {num_envs * steps / elapsed:.0f} game steps/s, "
+              f"mean score {env.column('score').mean():.1f}")
+
+
+if __name__ == "__main__":
+    envs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        if workers <= (os.cpu_count() or 1):
+            benchmark(envs, workers=workers)
@@ -0,0 +1,284 @@
+"""Offscreen render benchmark: draws each game's frames into an EGL pbuffer and reports FPS and GL calls.
+
+Runs without a window or GPU through EGL (Mesa llvmpipe with
+EGL_PLATFORM=surfaceless). freeglut cannot start without a window
+system, so the few GLUT calls the games make are replaced here: solid
+shapes are drawn through GLU quadrics and immediate-mode quads, bitmap
+glyphs become blank glBitmap calls of similar size, and a buffer swap
+becomes glFinish so each frame's rendering is waited for.
+
+    python render_bench.py [--games pacman 3d rain box] [--counts 10 100 1000] [--frames 200]
+"""
+import os
+
+# Must be set before OpenGL is first imported
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+import argparse
+import ctypes
+import importlib.util
+import random
+import sys
+import time
+
+from OpenGL import EGL
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import GLUT_WINDOW_HEIGHT, GLUT_WINDOW_WIDTH
+
+from frame_scheduler import FrameScheduler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WIDTH, HEIGHT = 1000, 800
+GLYPH_WIDTH, GLYPH_HEIGHT = 9, 14
+# Modules whose GL calls are counted, besides the game itself
+HELPER_MODULES = ('hud_text', 'pacman_batch', 'game3d_lod', 'scene_graph')
+
+
+def create_context(width=WIDTH, height=HEIGHT):
+    """Make a desktop GL context current on an offscreen pbuffer."""
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise RuntimeError("no EGL display; try EGL_PLATFORM=surfaceless")
+    attributes = (EGL.EGLint * 13)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                   EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+                                   EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                                   EGL.EGL_NONE)
+    config = EGL.EGLConfig()
+    count = EGL.EGLint()
+    if not EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+            or not count.value:
+        raise RuntimeError("no EGL config with desktop GL and a depth buffer")
+    surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * 5)(
+        EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise RuntimeError("could not make the EGL context current")
+    return display, surface, context
+
+
+# Offscreen versions of the GLUT calls the games make
+
+_quadric = None
+_blank_glyph = bytes(-(-GLYPH_WIDTH // 8) * GLYPH_HEIGHT)
+_CUBE_FACES = (
+    ((1, 0, 0), ((1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1))),
+    ((-1, 0, 0), ((-1, -1, 1), (-1, 1, 1), (-1, 1, -1), (-1, -1, -1))),
+    ((0, 1, 0), ((-1, 1, -1), (-1, 1, 1), (1, 1, 1), (1, 1, -1))),
+    ((0, -1, 0), ((-1, -1, 1), (-1, -1, -1), (1, -1, -1), (1, -1, 1))),
+    ((0, 0, 1), ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1))),
+    ((0, 0, -1), ((-1, 1, -1), (1, 1, -1), (1, -1, -1), (-1, -1, -1))),
+)
+
+
+def _get_quadric():
+    global _quadric
+    if _quadric is None:
+        _quadric = gluNewQuadric()
+    return _quadric
+
+
+def solid_cube(size):
+    half = size / 2
+    glBegin(GL_QUADS)
+    for normal, corners in _CUBE_FACES:
+        glNormal3f(*normal)
+        for x, y, z in corners:
+            glVertex3f(x * half, y * half, z * half)
+    glEnd()
+
+
+def solid_sphere(radius, slices, stacks):
+    gluSphere(_get_quadric(), radius, slices, stacks)
+
+
+def solid_cylinder(radius, height, slices, stacks):
+    quadric = _get_quadric()
+    gluCylinder(quadric, radius, radius, height, slices, stacks)
+    glPushMatrix()
+    glRotatef(180, 1, 0, 0)
+    gluDisk(quadric, 0, radius, slices, 1)
+    glPopMatrix()
+    glPushMatrix()
+    glTranslatef(0, 0, height)
+    gluDisk(quadric, 0, radius, slices, 1)
+    glPopMatrix()
+
+
+def bitmap_character(font, code):
+    glBitmap(GLYPH_WIDTH, GLYPH_HEIGHT, 0, 0, GLYPH_WIDTH, 0, _blank_glyph)
+
+
+def window_get(state):
+    return {GLUT_WINDOW_WIDTH: WIDTH, GLUT_WINDOW_HEIGHT: HEIGHT}.get(state, 0)
+
+
+def _nothing(*args):
+    pass
+
+
+OFFSCREEN_GLUT = {
+    'glutSolidCube': solid_cube,
+    'glutSolidSphere': solid_sphere,
+    'glutSolidCylinder': solid_cylinder,
+    'glutBitmapCharacter': bitmap_character,
+    'glutSwapBuffers': glFinish,
+    'glutPostRedisplay': _nothing,
+    'glutTimerFunc': _nothing,
+    'glutGet': window_get,
+}
+
+
+class CallCounter:
+    """Counts calls to every gl*/glu*/glut* function a set of modules looks up in its globals."""
+
+    def __init__(self):
+        self.calls = 0
+        self.installed = set()
+
+    def wrap(self, function):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def install(self, module):
+        if module.__name__ in self.installed:
+            return
+        self.installed.add(module.__name__)
+        namespace = vars(module)
+        for name, value in list(namespace.items()):
+            if name.startswith('gl') and callable(value):
+                namespace[name] = self.wrap(OFFSCREEN_GLUT.get(name, value))
+
+
+def load_script(filename, name):
+    """Import a game script by path (some names are not valid module names) without running main()."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Scripted scenes: setup(game, n) builds a scene with about n entities,
+# frame(game, i) changes it a little before frame i is drawn
+
+def setup_pacman(game, n):
+    game.init_game()
+    sim = game.sim
+    for _ in range(n):
+        sim.spawn_enemy()
+    for i in range(n):
+        sim.player_angle = i * 360 / max(n, 1)
+        sim.apply_input(game.FIRE)
+    for _ in range(max(n // 4, 1)):
+        sim.spawn_powerup()
+    sim.player_angle = 0.0
+
+
+def frame_pacman(game, i):
+    game.camera_mode = 'first' if i // 50 % 2 else 'third'  # Culled and unculled walls
+    game.camera_angle = i % 360
+    game.sim.player_angle = i * 2 % 360
+
+
+def setup_3d(game, n):
+    game.init()
+    game.reshape(WIDTH, HEIGHT)
+    game.enemies.clear()
+    game.bullets.clear()
+    for _ in range(n):
+        game.spawn_enemy()
+    for i in range(n):
+        game.gun_rotation = i * 360 / max(n, 1)
+        game.fire_bullet()
+    game.gun_rotation = 0
+
+
+def frame_3d(game, i):
+    game.first_person = i // 50 % 2 == 1
+    game.camera_angle = i % 360
+
+
+def setup_rain(game, n):
+    glClearColor(0.0, 0.0, 0.2, 1.0)
+    game.raindrops = [(random.uniform(-3, 3), random.uniform(-3, 3)) for _ in range(n)]
+
+
+def frame_rain(game, i):
+    game.update(1)
+
+
+def setup_box(game, n):
+    game.init()
+    game.points[:] = [game.Point(random.uniform(-1, 1), random.uniform(-1, 1)) for _ in range(n)]
+
+
+def frame_box(game, i):
+    game.update(1)
+
+
+# name -> (script, display function, tick, setup, frame, default entity counts)
+GAMES = {
+    'pacman': ('Project_Pacman.py', 'showScreen', 1 / 60, setup_pacman, frame_pacman, (10, 100, 500)),
+    '3d': ('3D-Game.py', 'display', 1 / 60, setup_3d, frame_3d, (5, 50, 200)),
+    'rain': ('Rain_Simulation_with_Adjustable_Slant.py', 'display', 1 / 60, setup_rain, frame_rain,
+             (1000, 3000, 10000)),
+    'box': ('Amaizing_Box.py', 'display', 0.05, setup_box, frame_box, (100, 1000, 5000)),
+}
+
+
+counter = CallCounter()
+
+
+def benchmark(name, counts=None, frames=200, warmup=20, seed=0):
+    """Draw `frames` frames of the scripted scene of one game at each entity count.
+
+    Returns one (count, frames per second, GL calls per frame) row per count.
+    """
+    script, display_name, tick, setup, frame, default_counts = GAMES[name]
+    game = load_script(script, 'bench_' + name)
+    for module in [game] + [sys.modules[helper] for helper in HELPER_MODULES if helper in sys.modules]:
+        counter.install(module)
+    game.scheduler = FrameScheduler(game.update, tick)
+    display = getattr(game, display_name)
+    rows = []
+    for count in counts or default_counts:
+        random.seed(seed)
+        setup(game, count)
+        glViewport(0, 0, WIDTH, HEIGHT)
+        for i in range(warmup):
+            frame(game, i)
+            display()
+        counter.calls = 0
+        start = time.perf_counter()
+        for i in range(frames):
+            frame(game, warmup + i)
+            display()
+        elapsed = time.perf_counter() - start
+        rows.append((count, frames / elapsed, counter.calls / frames))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen render benchmark of the GLUT games")
+    parser.add_argument('--games', nargs='+', choices=sorted(GAMES), default=list(GAMES))
+    parser.add_argument('--counts', nargs='+', type=int, help="entity counts (default: per game)")
+    parser.add_argument('--frames', type=int, default=200, help="timed frames per count")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    create_context()
+    print(f"{glGetString(GL_RENDERER).decode()}, GL {glGetString(GL_VERSION).decode()}")
+    print(f"{'game':8} {'entities':>8} {'fps':>9} {'GL calls/frame':>15}")
+    for name in args.games:
+        for count, fps, calls in benchmark(name, args.counts, args.frames, seed=args.seed):
+            print(f"{name:8} {count:8d} {fps:9.1f} {calls:15.0f}")
+
+
+if __name__ == "__main__":
+    main()
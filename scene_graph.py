@@ -0,0 +1,95 @@
+from OpenGL.GL import *
+
+
+def apply_transform(steps):
+    """Multiply ('translate', x, y, z), ('rotate', angle, x, y, z) and ('scale', x, y, z) steps onto the modelview."""
+    for step in steps:
+        if step[0] == 'translate':
+            glTranslatef(step[1], step[2], step[3])
+        elif step[0] == 'rotate':
+            glRotatef(step[1], step[2], step[3], step[4])
+        elif step[0] == 'scale':
+            glScalef(step[1], step[2], step[3])
+        else:
+            raise ValueError(f"unknown transform step {step[0]!r}")
+
+
+class Node:
+    """Retained-mode scene node: a transform, an optional draw callback and child nodes.
+
+    `transform` is a sequence of apply_transform() steps, or a callable
+    returning one every frame for moving parts. `draw` runs in the node's
+    space; pass dynamic=True when what it draws changes from frame to frame.
+
+    A subtree with no callable transforms and no dynamic draws anywhere is
+    static: it is baked into one display list the first time it is
+    rendered and replayed from then on. A node that is not static still
+    bakes its own static draw and static children into one list, so only
+    the moving transforms and dynamic draws cost calls every frame.
+    """
+
+    def __init__(self, draw=None, transform=(), children=(), dynamic=False):
+        self.draw = draw
+        self.transform = transform
+        self.dynamic = dynamic
+        self.parent = None
+        self.children = []
+        self.baked = None  # Display list of the static part, built on first render
+        for child in children:
+            self.add(child)
+
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        self.invalidate()
+        return child
+
+    @property
+    def static(self):
+        return not self.dynamic and not callable(self.transform) and all(child.static for child in self.children)
+
+    def invalidate(self):
+        """Drop the baked lists of this node and every node containing it, so they are rebaked."""
+        node = self
+        while node is not None:
+            if node.baked is not None:
+                glDeleteLists(node.baked, 1)
+                node.baked = None
+            node = node.parent
+
+    def render(self):
+        if self.static:
+            self.call_baked(self.emit)
+            return
+        glPushMatrix()
+        apply_transform(self.transform() if callable(self.transform) else self.transform)
+        if (self.draw is not None and not self.dynamic) or any(child.static for child in self.children):
+            self.call_baked(self.emit_static_contents)
+        if self.dynamic and self.draw is not None:
+            self.draw()
+        for child in self.children:
+            if not child.static:
+                child.render()
+        glPopMatrix()
+
+    def call_baked(self, emit):
+        if self.baked is None:
+            self.baked = glGenLists(1)
+            glNewList(self.baked, GL_COMPILE)
+            emit()
+            glEndList()
+        glCallList(self.baked)
+
+    def emit(self):
+        """Issue this static subtree's GL calls, transform included."""
+        glPushMatrix()
+        apply_transform(self.transform)
+        self.emit_static_contents()
+        glPopMatrix()
+
+    def emit_static_contents(self):
+        if self.draw is not None and not self.dynamic:
+            self.draw()
+        for child in self.children:
+            if child.static:
+                child.emit()
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from game3d_entities import BULLET_RADIUS, BulletStore, EnemyStore, SpatialHash, find_hits
+
+
+def brute_force_hits(bullets, enemies):
+    """find_hits by testing every bullet's swept segment against every enemy."""
+    candidates = []
+    for x, y, z, dx, dz, distance in bullets:
+        x0, z0 = x - dx, z - dz
+        length2 = dx * dx + dz * dz
+        touched = []
+        for e, (ex, ey, ez, size, *_) in enumerate(enemies):
+            t = min(max(((ex - x0) * dx + (ez - z0) * dz) / length2, 0.0), 1.0)
+            miss2 = (ex - x0 - t * dx) ** 2 + (ez - z0 - t * dz) ** 2
+            reach = size + BULLET_RADIUS
+            if miss2 < reach * reach:
+                touched.append((max(t - math.sqrt((reach * reach - miss2) / length2), 0.0), e))
+        candidates.append(sorted(touched))
+    taken = set()
+    hits = []
+    for b, touched in enumerate(candidates):
+        for _, e in touched:
+            if e not in taken:
+                taken.add(e)
+                hits.append((b, e))
+                break
+    return sorted(hits)
+
+
+def random_layout(rng, speed):
+    enemies = EnemyStore()
+    bullets = BulletStore(512)
+    for _ in range(rng.integers(1, 150)):
+        enemies.append((rng.uniform(-10, 10), 0.5, rng.uniform(-10, 10), rng.uniform(0.3, 0.605), 1.0, 0.02, 0.0))
+    for _ in range(rng.integers(1, 100)):
+        angle = rng.uniform(0, 2 * math.pi)
+        bullets.fire(rng.uniform(-10, 10), 1.25, rng.uniform(-10, 10), -math.sin(angle) * speed, -math.cos(angle) * speed)
+    bullets.advance()
+    return bullets, enemies
+
+
+@pytest.mark.parametrize('speed', [0.3, 1.0, 3.0, 8.0])
+def test_swept_hits_match_brute_force(speed):
+    rng = np.random.default_rng(int(speed * 10))
+    for _ in range(75):
+        bullets, enemies = random_layout(rng, speed)
+        hit_b, hit_e = find_hits(bullets, enemies, SpatialHash(enemies.column('x'), enemies.column('z')))
+        assert sorted(zip(hit_b.tolist(), hit_e.tolist())) == brute_force_hits(list(bullets), list(enemies))
+
+
+def test_fast_bullet_hits_enemy_it_passes_through():
+    enemies = EnemyStore()
+    enemies.append((0.0, 0.5, -5.0, 0.3, 1.0, 0.0, 0.0))
+    bullets = BulletStore(4)
+    bullets.fire(0.0, 1.25, 0.0, 0.0, -6.0)
+    bullets.advance()
+    hit_b, hit_e = find_hits(bullets, enemies, SpatialHash(enemies.column('x'), enemies.column('z')))
+    assert hit_b.tolist() == [0] and hit_e.tolist() == [0]
+
+
+def test_crowd_along_a_wall_is_confined_to_the_arena():
+    # A wave spawned along one wall, far denser than separation can settle in place
+    rng = np.random.default_rng(0)
+    enemies = EnemyStore()
+    for x, z in zip(rng.uniform(-9, 9, 500), rng.uniform(8.5, 9.5, 500)):
+        enemies.append((x, 0.5, z, 0.6, 1.0, 0.02, 0.0))
+    for _ in range(50):
+        enemies.separate()
+        enemies.confine(9.5)
+    assert np.abs(enemies.column('x')).max() <= 9.5
+    assert np.abs(enemies.column('z')).max() <= 9.5
+    assert enemies.column('z').min() < 0  # The crowd spreads into the arena
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from pacman_maze import VERTICAL, FlowField, MazeData, NavGrid, generate_maze_data
+from pacman_sim import MAZE_WALLS, TICK, PacmanSim
+
+
+def crosses_wall(nav, a, b):
+    """True if a wall segment touches the straight link between the centres of cells a and b."""
+    ax, ay = nav.center_list_x[a], nav.center_list_y[a]
+    bx, by = nav.center_list_x[b], nav.center_list_y[b]
+    for kind, c, lo, hi in nav.wall_index.segments:
+        if kind == VERTICAL:
+            if min(ax, bx) <= c <= max(ax, bx) and lo <= max(ay, by) and min(ay, by) <= hi:
+                return True
+        elif min(ay, by) <= c <= max(ay, by) and lo <= max(ax, bx) and min(ax, bx) <= hi:
+            return True
+    return False
+
+
+def links(nav):
+    for c in range(nav.nx * nav.ny):
+        for n in nav.linked(c):
+            yield c, n
+
+
+@pytest.mark.parametrize('maze', [
+    MazeData(MAZE_WALLS),
+    generate_maze_data(10, 10, seed=1),
+    generate_maze_data(10, 10, cell_size=60, seed=2),
+], ids=['default', 'generated', 'generated-2'])
+def test_flow_field_links_do_not_cross_walls(maze):
+    crossing = [(a, b) for a, b in links(maze.nav) if crosses_wall(maze.nav, a, b)]
+    assert not crossing
+
+
+def test_corridor_wide_nav_cells_do_not_link_through_walls():
+    maze = generate_maze_data(10, 10, seed=1)
+    maze = MazeData(maze.walls, maze.start, nav_cell_size=60, spawn_cell_size=10)
+    assert not [(a, b) for a, b in links(maze.nav) if crosses_wall(maze.nav, a, b)]
+    # A perfect maze is a tree: one corridor link fewer than it has cells
+    assert int(maze.nav.free.sum()) == 10 * 10
+    assert sum(len(maze.nav.linked(c)) for c in np.flatnonzero(maze.nav.free).tolist()) == 2 * (10 * 10 - 1)
+
+
+def test_saved_links_round_trip(tmp_path):
+    maze = generate_maze_data(8, 8, seed=3)
+    maze.save(tmp_path / 'maze.npz')
+    loaded = MazeData.load(tmp_path / 'maze.npz')
+    assert np.array_equal(loaded.nav.link_offsets, maze.nav.link_offsets)
+    assert np.array_equal(loaded.nav.links, maze.nav.links)
+    rebuilt = MazeData(maze.walls, maze.start, maze.nav_cell_size, maze.spawn_cell_size)
+    assert np.array_equal(rebuilt.nav.links, maze.nav.links)
+
+
+def test_enemies_reach_player_in_generated_maze():
+    maze = generate_maze_data(10, 10, seed=1)
+    sim = PacmanSim(maze=maze, seed=2, use_arrays=True, enemy_count=10)
+    _, _, x1, y1 = maze.extent
+    sim.player_pos = [x1 - 30.0, y1 - 30.0, 20.0]
+    sim.life = 10 ** 6
+    for _ in range(6000):
+        sim.step(TICK)
+    assert sim.life < 10 ** 6
+
+
+def test_load_uses_saved_links(tmp_path, monkeypatch):
+    maze = generate_maze_data(8, 8, seed=3)
+    maze.save(tmp_path / 'maze.npz')
+
+    def rebuild(self):
+        raise AssertionError("links rebuilt on load")
+    monkeypatch.setattr(NavGrid, 'link_arrays', rebuild)
+    MazeData.load(tmp_path / 'maze.npz')
+
+
+def test_flow_field_is_bounded_by_reach():
+    maze = generate_maze_data(30, 30, seed=5)
+    nav = maze.nav
+    field = FlowField(nav, reach=300)
+    full = FlowField(nav, reach=nav.nx * nav.ny)
+    gx, gy = maze.start
+    field.update(gx, gy)
+    full.update(gx, gy)
+    routed = ~np.isnan(field.next_x)
+    # The goal cell itself is reached but never routed
+    reached = int((routed & nav.free).sum()) + 1
+    assert 300 <= reached < int((~np.isnan(full.next_x) & nav.free).sum())
+    # Inside the window the field agrees with the full one; outside it agents head straight for the goal
+    assert np.array_equal(field.next_x[routed & nav.free], full.next_x[routed & nav.free])
+    far = int(np.flatnonzero(~routed & nav.free)[0])
+    assert field.target(nav.center_list_x[far], nav.center_list_y[far], gx, gy) == (gx, gy)
+    # Moving the goal clears the cells routed for the old one
+    x0, y0, x1, y1 = maze.extent
+    field.update(x1 - 30.0, y1 - 30.0)
+    assert int((~np.isnan(field.next_x)).sum()) == len(field.routed)
+
+
+@pytest.mark.parametrize('use_arrays', [False, True], ids=['lists', 'arrays'])
+def test_sims_sharing_a_maze_keep_their_own_flow_field(use_arrays, monkeypatch):
+    maze = generate_maze_data(10, 10, seed=1)
+    sims = [PacmanSim(maze=maze, seed=seed, use_arrays=use_arrays) for seed in (1, 2)]
+    _, _, x1, y1 = maze.extent
+    sims[1].player_pos = [x1 - 30.0, y1 - 30.0, 20.0]
+    assert sims[0].flow is not sims[1].flow
+    searches = []
+    exits_of = NavGrid.exits_of
+    monkeypatch.setattr(NavGrid, 'exits_of', lambda nav, reached: searches.append(1) or exits_of(nav, reached))
+    for _ in range(50):
+        for sim in sims:
+            sim.step(TICK)
+    # Players stand still, so each field is searched once, not on every tick
+    assert len(searches) == 2
@@ -0,0 +1,44 @@
+import os
+import random
+import subprocess
+import sys
+
+import Project_Pacman as game
+from pacman_replay import KEY, MOUSE, SPECIAL, Recorder, Recording
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def record(path, ticks, seed=12345):
+    """Play a scripted bot through the game's input handling while recording it."""
+    game.seed = seed
+    game.recorder = Recorder(path, seed)
+    game.init_game()
+    bot = random.Random(5)
+    try:
+        for _ in range(ticks):
+            for _ in range(bot.choice([0, 0, 1, 2])):
+                roll = bot.random()
+                if roll < 0.6:
+                    game.handle_event(KEY, bot.choice(b'wsadrx'))
+                elif roll < 0.8:
+                    game.handle_event(MOUSE, bot.choice([0, 1, 4, 5]))
+                else:
+                    game.handle_event(SPECIAL, bot.choice([100, 101, 102, 103]))
+            game.run_tick()
+        game.close_recording()
+    finally:
+        game.recorder = None
+    return game.sim.state_digest()
+
+
+def test_replay_reproduces_recorded_digest(tmp_path):
+    path = str(tmp_path / 'game.rec')
+    digest = record(path, 5000)
+    recording = Recording.load(path)
+    assert recording.digest == digest
+    assert recording.final_tick == 5000
+
+    result = subprocess.run([sys.executable, 'Project_Pacman.py', '--replay', path, '--headless'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    assert "Final state matches the recording" in result.stdout
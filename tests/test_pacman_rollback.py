@@ -0,0 +1,65 @@
+import random
+import socket
+
+import pytest
+
+from pacman_rollback import RollbackSession, decode_inputs, delta_apply, delta_encode, encode_inputs
+from pacman_sim import FIRE, TICK, PacmanSim
+
+
+def free_udp_ports(count):
+    socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(count)]
+    for sock in socks:
+        sock.bind(('127.0.0.1', 0))
+    ports = [sock.getsockname()[1] for sock in socks]
+    for sock in socks:
+        sock.close()
+    return ports
+
+
+def test_delta_round_trip():
+    sim = PacmanSim(seed=1)
+    before = sim.snapshot()
+    sim.step(TICK, [FIRE])
+    after = sim.snapshot()
+    delta = delta_encode(before, after)
+    assert delta_apply(delta, before) == after
+    assert delta_apply(delta, after) == before
+
+
+@pytest.mark.parametrize('use_arrays', [False, True])
+def test_two_peers_converge_on_sequential_result(use_arrays):
+    frames = 1500
+    ports = free_udp_ports(2)
+    sims = [PacmanSim(seed=7, use_arrays=use_arrays) for _ in range(2)]
+    sessions = [RollbackSession(sims[0], 0, ports[0], ports[1]),
+                RollbackSession(sims[1], 1, ports[1], ports[0])]
+    try:
+        # Peers take turns at random, so each runs ahead on predicted input and rolls back
+        rng = random.Random(3)
+        sent = [{}, {}]
+        while min(session.frame for session in sessions) < frames:
+            player = rng.randrange(2)
+            session = sessions[player]
+            if session.frame >= frames:
+                session.sync()
+                continue
+            keys = [rng.choice([b'w', b'w', b's', b'a', b'd', FIRE])] if rng.random() < 0.5 else []
+            if rng.random() < 0.01:
+                keys.append(b'r')
+            frame = session.frame
+            if session.advance(keys):
+                sent[player][frame] = encode_inputs(keys)
+        for _ in range(5):
+            for session in sessions:
+                session.sync()
+    finally:
+        for session in sessions:
+            session.close()
+
+    reference = PacmanSim(seed=7, use_arrays=use_arrays)
+    for frame in range(frames):
+        reference.step(TICK, decode_inputs(sent[0][frame]) + decode_inputs(sent[1][frame]))
+    assert sum(session.rollbacks for session in sessions) > 0
+    assert sims[0].state_digest() == reference.state_digest()
+    assert sims[1].state_digest() == reference.state_digest()
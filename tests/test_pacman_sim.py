@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from pacman_sim import FIRE, TICK, PacmanSim
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_list_and_array_paths_match(seed):
+    lists = PacmanSim(seed=seed, enemy_count=20)
+    arrays = PacmanSim(seed=seed, use_arrays=True, enemy_count=20)
+    bot = random.Random(seed)
+    scored = 0
+    for tick in range(3000):
+        inputs = [bot.choice([b'w', b'w', b'a', b'd', b's', FIRE])]
+        if lists.game_over:
+            scored += lists.score
+            inputs.append(b'r')
+        lists.step(TICK, inputs)
+        arrays.step(TICK, inputs)
+        assert (lists.score, lists.life, lists.bullets_missed, lists.game_over) == \
+               (arrays.score, arrays.life, arrays.bullets_missed, arrays.game_over), tick
+        assert [row[:6] for row in lists.bullets] == [row[:6] for row in arrays.bullets], tick
+        # Enemy steps may round differently in the last bit between math and NumPy
+        assert len(lists.enemies) == len(arrays.enemies), tick
+        assert sum(lists.enemies, []) == pytest.approx(sum(list(arrays.enemies), []), rel=1e-9, abs=1e-9), tick
+    assert scored > 0